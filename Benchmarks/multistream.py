@@ -0,0 +1,208 @@
+"""
+Benchmark of multi-stream detection throughput.
+
+Runs the cams1.py / detect2.py style loop (threaded readers, timestamp
+synchronization, one batched inference per frame set, rendering) headless on
+synthetic or recorded streams, and sweeps the number of streams, the model and the
+resolution. Every configuration runs in its own Python process so that peak RSS
+and CPU time belong to that configuration only.
+
+The result is a machine-readable table (CSV, or JSON lines when the output file
+ends with .jsonl) with, per configuration: sustained FPS per stream, glass-to-glass
+latency percentiles, CPU utilization (in cores), peak RSS and cold start (model load
+and first inference).
+
+Usage:
+    python Benchmarks/multistream.py --streams 1,2,4,8,16 --models yolov5s,yolov8n \\
+        --resolutions 640x480,1280x720 --duration 30 --output results.csv
+    python Benchmarks/multistream.py --sources videos/entrance.mp4,videos/dock.mp4 --streams 2,4
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'Cameras'))
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'Yolov5'))
+
+COLUMNS = ["model", "streams", "resolution", "imgsz", "duration_s", "frame_sets", "fps_per_stream",
+           "latency_p50_ms", "latency_p95_ms", "latency_p99_ms", "cpu_cores", "peak_rss_mb",
+           "load_s", "first_inference_s", "error"]
+
+
+def load_detector(model_name, imgsz, device):
+    """
+    Loads a YOLOv5 or YOLOv8 model and returns a function detecting a list of frames in one batch.
+
+    Returns:
+    (detect, render): detect(frames) returns the batch results, render(results) the annotated frames.
+    """
+    if model_name.startswith("yolov5"):
+        from model_registry import load_model
+        model, _ = load_model(model_name, device=device or None)
+        return lambda frames: model(frames, size=imgsz), lambda results: results.render()
+    from ultralytics import YOLO
+    model = YOLO(f"{model_name}.pt")
+    predict_args = dict(imgsz=imgsz, verbose=False, stream=True)
+    if device:
+        predict_args["device"] = device
+    return (lambda frames: list(model.predict(frames, **predict_args)),
+            lambda results: [result.plot() for result in results])
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        # Windows : pas de module resource
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilo-octets sous Linux, octets sous macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_config(model_name, streams, resolution, imgsz, duration, fps, sources, device):
+    """
+    Runs one configuration in the current process and returns its measurements.
+    """
+    from capture import open_readers, release_readers
+    from pipeline import EndOfStream, Pipeline, Stage
+    from sources import HeadlessSink
+    from sync import FrameSynchronizer
+
+    # Démarrage à froid : chargement du modèle puis première inférence
+    start = time.perf_counter()
+    detect, render = load_detector(model_name, imgsz, device)
+    load_seconds = time.perf_counter() - start
+    width, height = (int(value) for value in resolution.split("x"))
+    if sources:
+        # Vidéos enregistrées, réparties sur les flux
+        descriptions = [sources[index % len(sources)] for index in range(streams)]
+    else:
+        descriptions = [f"synthetic:{width}x{height}@{fps}"] * streams
+    cameras = open_readers(descriptions)
+    sync = FrameSynchronizer(cameras, tolerance=1.0 / fps, policy="drop")
+
+    # Préchauffage hors mesure (allocation des tampons, premiers noyaux)
+    import numpy as np
+    start = time.perf_counter()
+    detect([np.zeros((height, width, 3), np.uint8)] * streams)
+    first_inference_seconds = time.perf_counter() - start
+
+    def capture():
+        frame_set = sync.next()
+        if frame_set is None:
+            if any(reader.ended for reader in cameras):
+                raise EndOfStream
+            return None
+        return {"timestamp": min(frame_set.timestamps), "frames": frame_set.frames}
+
+    def infer(packet):
+        packet["results"] = detect(packet["frames"])
+        return packet
+
+    def draw(packet):
+        packet["frames"] = render(packet["results"])
+        return packet
+
+    sink = HeadlessSink(max_seconds=duration)
+    pipeline = Pipeline(capture, [Stage("infer", infer), Stage("render", draw)], sink)
+    cpu_start, wall_start = os.times(), time.monotonic()
+    pipeline.run()
+    cpu_end, wall = os.times(), time.monotonic() - wall_start
+    release_readers(cameras)
+
+    latency = pipeline.glass_to_glass.summary()
+    peak = peak_rss_mb()
+    cpu = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    return {
+        "duration_s": round(wall, 2),
+        "frame_sets": sink.frames,
+        "fps_per_stream": round(sink.frames / wall, 2) if wall else 0.0,
+        "latency_p50_ms": round(latency["p50_ms"], 1),
+        "latency_p95_ms": round(latency["p95_ms"], 1),
+        "latency_p99_ms": round(latency["p99_ms"], 1),
+        "cpu_cores": round(cpu / wall, 2) if wall else 0.0,
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+        "load_s": round(load_seconds, 2),
+        "first_inference_s": round(first_inference_seconds, 2),
+    }
+
+
+def run_isolated(config, args):
+    """
+    Runs one configuration in a child process and returns its table row.
+    """
+    command = [sys.executable, os.path.realpath(__file__), "--run-one", json.dumps(config),
+               "--duration", str(args.duration), "--fps", str(args.fps)]
+    if args.sources:
+        command += ["--sources", args.sources]
+    if args.device:
+        command += ["--device", args.device]
+    row = dict(config, error="")
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, check=True,
+                                timeout=args.duration * 3 + 600).stdout
+        # La dernière ligne de la sortie est le résultat JSON (le reste vient des bibliothèques)
+        row.update(json.loads(output.strip().splitlines()[-1]))
+    except (subprocess.SubprocessError, ValueError, IndexError) as error:
+        stderr = getattr(error, "stderr", None) or str(error)
+        row["error"] = stderr.strip().splitlines()[-1] if stderr.strip() else type(error).__name__
+    return row
+
+
+def write_rows(rows, output):
+    if output and output.endswith(".jsonl"):
+        with open(output, "w") as file:
+            for row in rows:
+                file.write(json.dumps(row) + "\n")
+        return
+    file = open(output, "w", newline="") if output else sys.stdout
+    writer = csv.DictWriter(file, fieldnames=COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    if output:
+        file.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Multi-stream detection throughput benchmark")
+    parser.add_argument("--streams", default="1,2,4,8,16", help="Comma separated numbers of streams")
+    parser.add_argument("--models", default="yolov5s,yolov5m,yolov5l,yolov5x,yolov8n,yolov8s")
+    parser.add_argument("--resolutions", default="640x480,1280x720", help="Stream resolutions, WxH")
+    parser.add_argument("--imgsz", default="640", help="Comma separated model input sizes")
+    parser.add_argument("--duration", type=float, default=20, help="Measured seconds per configuration")
+    parser.add_argument("--fps", type=float, default=30, help="Frame rate of the synthetic streams")
+    parser.add_argument("--sources", default="", help="Comma separated videos to use instead of synthetic streams")
+    parser.add_argument("--device", default="", help="Torch device, e.g. cpu or 0")
+    parser.add_argument("--output", default="", help="Output .csv or .jsonl file (default: CSV on stdout)")
+    parser.add_argument("--run-one", default="", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sources = [source for source in args.sources.split(",") if source]
+    if args.run_one:
+        config = json.loads(args.run_one)
+        result = run_config(config["model"], config["streams"], config["resolution"], config["imgsz"],
+                            args.duration, args.fps, sources, args.device)
+        print(json.dumps(result))
+        return
+
+    rows = []
+    for model_name in args.models.split(","):
+        for resolution in args.resolutions.split(","):
+            for imgsz in (int(size) for size in args.imgsz.split(",")):
+                for streams in (int(count) for count in args.streams.split(",")):
+                    config = {"model": model_name, "streams": streams, "resolution": resolution, "imgsz": imgsz}
+                    print(f"Running {config}", file=sys.stderr)
+                    rows.append(run_isolated(config, args))
+    write_rows(rows, args.output)
+
+
+if __name__ == "__main__":
+    main()
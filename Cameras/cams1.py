@@ -1,38 +1,106 @@
-import cv2
-import torch
+import os
+import sys
+import time
 
-# Charger le modèle YOLOv5
-model = torch.hub.load('ultralytics/yolov5', 'yolov5x', pretrained=True)
+# Modèles et rendu des boîtes (rendering.py, utilisé par roi.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'Yolov5'))
 
-camera1 = cv2.VideoCapture(0)
-camera2 = cv2.VideoCapture(4)
+from capture import open_readers
+from pipeline import Stage
+from motion import MotionGate
+from roi import RegionsOfInterest
+from runner import MultiCameraRunner
+from shm import SharedCameras
+from sources import sources_from_env
 
-if not camera1.isOpened():
-    print('Erreur ...cam1')
+# Caméras à utiliser : index OpenCV, vidéos, dossiers d'images ou "synthetic:WxH@FPS"
+# (modifiable par la variable d'environnement CAMERAS, ex. CAMERAS=synthetic:1280x720@30,video.mp4).
+# Sans écran : HEADLESS=1 (et DURATION=secondes), voir runner.py
+CAMERAS = sources_from_env([0, 4])
 
-if not camera2.isOpened():
-    print('Erreur.. cam2')
+# Afficher les métriques sur la mosaïque, et fichier où elles sont enregistrées toutes les 10 s
+SHOW_OVERLAY = True
+METRICS_FILE = "metrics.jsonl"
 
-while True:
-    ret1, frame1 = camera1.read()
-    ret2, frame2 = camera2.read()
+# Zones d'intérêt par caméra, (x, y, largeur, hauteur) en pixels ou en fractions de l'image ;
+# None : image entière. Seules ces zones sont envoyées au modèle, à leur résolution d'origine
+ROIS = [None, None]
 
-    if ret1 and ret2:
-        # Appliquer YOLOv5 aux deux images
-        results1 = model(frame1)
-        results2 = model(frame2)
+# Capture dans des processus séparés (mémoire partagée), utile au-delà de ~4 flux 1080p
+MULTIPROCESS = False
 
-        # Récupérer les images avec les détections
-        frame1 = results1.render()[0]
-        frame2 = results2.render()[0]
 
-        # Concaténer les images pour l'affichage
-        frame = cv2.hconcat([frame1, frame2])
-        cv2.imshow("Cameras", frame)
+def main():
+    if MULTIPROCESS:
+        # Un processus par caméra, images copiées hors de la mémoire partagée : elles restent
+        # dans les files des étapes bien après la réécriture de leur case
+        shared_cameras = SharedCameras(CAMERAS, shape=(480, 640), slots=16, copy=True)
+        cameras = shared_cameras.readers
+    else:
+        # Un thread de lecture par caméra, seule la dernière image est conservée
+        cameras = open_readers(CAMERAS)
 
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+    # Importé ici et non en tête : les processus de capture ("spawn") ré-importent ce script sans torch
+    from model_registry import get_model
 
-camera1.release()
-camera2.release()
-cv2.destroyAllWindows()
+    # Modèle YOLOv5 du registre local (sans réseau), chargé à la première détection
+    model = get_model('yolov5x')
+
+    # Découpe des zones d'intérêt et remise des boîtes en coordonnées de l'image entière
+    regions = RegionsOfInterest(ROIS, len(cameras))
+
+    # Une porte de mouvement par caméra : pas de détection sur une scène immobile
+    gates = [MotionGate(ratio_threshold=0.01, max_skip=150) for _ in cameras]
+
+    # Dernières détections de chaque caméra, redessinées sur l'image courante tant que la scène ne bouge pas
+    last_detections = [None] * len(cameras)
+
+    # Capture synchronisée, mosaïque, métriques et export communs aux scripts multi-caméras
+    runner = MultiCameraRunner(cameras, SHOW_OVERLAY, METRICS_FILE)
+    camera_metrics = runner.camera_metrics
+    runner.registry.add_source("model", model.cold_start)
+    runner.registry.add_source("motion", lambda: {reader.name: motion_gate.stats()
+                                                  for reader, motion_gate in zip(cameras, gates)})
+
+    def gate(packet):
+        # Caméras dont l'image a changé (ou sans détection encore disponible)
+        packet["moving"] = [index for index, (motion_gate, frame) in enumerate(zip(gates, packet["frames"]))
+                            if motion_gate.check(frame) or last_detections[index] is None]
+        return packet
+
+    def infer(packet):
+        # Appliquer YOLOv5 aux zones d'intérêt des caméras en mouvement en une seule passe batchée
+        # (un seul prétraitement, un seul forward et un seul NMS pour le lot)
+        moving = packet["moving"]
+        packet["detections"] = [None] * len(cameras)
+        if moving:
+            start = time.perf_counter()
+            crops, origins = regions.crop(packet["frames"], moving)
+            results = model(crops, size=regions.inference_size(crops))
+            packet["detections"] = regions.merge([boxes.cpu().numpy() for boxes in results.xyxy], origins)
+            for index in moving:
+                camera_metrics[index].record_inference(time.perf_counter() - start)
+        return packet
+
+    def render(packet):
+        # Dessiner les zones et les détections sur l'image courante de chaque caméra ;
+        # les caméras immobiles reprennent leurs dernières boîtes, l'image reste en direct
+        for index in packet["moving"]:
+            last_detections[index] = packet["detections"][index]
+        packet["frames"] = [regions.annotate(frame.copy(), index, last_detections[index], model.names)
+                            for index, frame in enumerate(packet["frames"])]
+        return packet
+
+    infer_stage = Stage("infer", infer)
+    runner.run([Stage("gate", gate), infer_stage, Stage("render", render)], infer_stage)
+
+    print(model.cold_start())
+    for reader, motion_gate in zip(cameras, gates):
+        print(reader.name, motion_gate.stats())
+    runner.close()
+    if MULTIPROCESS:
+        shared_cameras.release()
+
+
+if __name__ == "__main__":
+    main()
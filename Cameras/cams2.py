@@ -1,11 +1,27 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import time
+
 import streamlit as st
 import cv2
-import torch
 import numpy as np
 from PIL import Image
 
-# Charger le modèle YOLOv5
-model = torch.hub.load('ultralytics/yolov5', 'yolov5l', pretrained=True)
+from capture import CameraReader
+from pipeline import EndOfStream, Pipeline, Stage
+from recorder import AsyncRecorder
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'Yolov5'))
+from model_registry import get_model
+from counting import ClassCounter, count_matrix, counts_to_dict
+from rendering import default_renderer
+
+# Modèle YOLOv5 du registre local : chargé une seule fois par processus, au premier usage,
+# et non à chaque ré-exécution du script par Streamlit
+model = get_model('yolov5l')
 
 # Initialisation de la caméra (remplacer par la capture de vidéo Streamlit si disponible)
 # Pour l'instant, cette fonctionnalité n'est pas directement supportée par Streamlit, mais vous pouvez utiliser des images téléchargées ou des vidéos stockées.
@@ -22,30 +38,164 @@ def detect_objects(frame):
     frame = results.render()[0]
     return frame
 
+# Détection en direct sur une caméra : capture, prétraitement, détection, rendu et affichage
+# se chevauchent grâce au pipeline, chaque étape derrière une file bornée
+def run_live_camera(camera_id):
+    cap = CameraReader(load_camera(camera_id), name=f"cam{camera_id}").start()
+    placeholder = st.empty()
+    stats_placeholder = st.sidebar.empty()
+
+    def capture():
+        ret, frame, timestamp = cap.read_timestamped(fresh=True)
+        if not ret:
+            if cap.ended:
+                raise EndOfStream
+            return None
+        return {"timestamp": timestamp, "frame": frame}
+
+    def preprocess(packet):
+        packet["frame"] = cv2.cvtColor(packet["frame"], cv2.COLOR_BGR2RGB)
+        return packet
+
+    def infer(packet):
+        packet["results"] = model(packet["frame"])
+        return packet
+
+    def render(packet):
+        packet["frame"] = packet["results"].render()[0]
+        return packet
+
+    def display(packet):
+        placeholder.image(packet["frame"], caption="Détection en direct", use_column_width=True)
+        if packet["seq"] % 30 == 0:
+            stats_placeholder.json(pipeline.stats())
+
+    pipeline = Pipeline(capture, [Stage("preprocess", preprocess), Stage("infer", infer), Stage("render", render)], display)
+    try:
+        # S'arrête quand Streamlit relance le script (case décochée, nouveau fichier...)
+        pipeline.run()
+    finally:
+        cap.release()
+
+# Détection sur une vidéo téléchargée : décodage image par image depuis un fichier temporaire,
+# détection par lots, encodage de la vidéo annotée sur un thread en arrière-plan
+def run_video(path, every_nth=1, batch_size=8):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        cap.release()
+        st.error("Erreur... vidéo illisible")
+        return None
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+    output_path = os.path.splitext(path)[0] + "_detections.mp4"
+    counter = ClassCounter(len(model.names))
+    progress = st.progress(0.0)
+    status = st.empty()
+    preview = st.empty()
+    start = time.perf_counter()
+    frames, timestamps = [], []
+    index = 0
+
+    def detect_batch():
+        # Un seul forward pour le lot ; boîtes dessinées directement sur les images BGR
+        results = model([cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames], size=640)
+        counter.update(count_matrix(results.xyxy, len(model.names)))
+        for frame, timestamp, boxes in zip(frames, timestamps, results.xyxy):
+            recorder.write(default_renderer.draw(frame, boxes, model.names, (0, 0, 255), 2), timestamp)
+        elapsed = time.perf_counter() - start
+        preview.image(frames[-1], channels="BGR", caption="Dernière image détectée", use_column_width=True)
+        status.text(f"{counter.images} images détectées ({counter.images / elapsed:.1f} img/s), "
+                    f"{index} images lues, encodage {recorder.stats()['encode_fps']:.0f} img/s")
+        if total:
+            progress.progress(min(index / total, 1.0))
+        frames.clear()
+        timestamps.clear()
+
+    # Pas de perte d'image : le décodage attend l'encodeur si celui-ci est en retard
+    recorder = AsyncRecorder(output_path, fourcc="mp4v", fps=fps / every_nth, queue_size=4 * batch_size,
+                             policy="block")
+    try:
+        # grab() seul pour les images sautées : pas de conversion ni de copie
+        while cap.grab():
+            if index % every_nth == 0:
+                ret, frame = cap.retrieve()
+                if ret:
+                    frames.append(frame)
+                    timestamps.append(index / fps)
+            index += 1
+            if len(frames) == batch_size:
+                detect_batch()
+        if frames:
+            detect_batch()
+    finally:
+        # Aussi quand Streamlit interrompt le script (nouvelle exécution, arrêt de la session)
+        cap.release()
+        recorder.release()
+    progress.progress(1.0)
+    st.write("Nombre d'objets détectés par classe:")
+    st.table(counts_to_dict(counter.totals, model.names).items())
+    return output_path
+
 # Fonction principale de l'application Streamlit
 def main():
     st.title("Détection d'objets en temps réel avec YOLOv5")
 
     # Sélection de la source de la caméra (pour la démo, vous pouvez utiliser des fichiers téléchargés)
-    # cam_input = st.selectbox("Choisir la caméra", options=[0, 1, 2, 3, 4, 5], index=0)
+    cam_input = st.sidebar.selectbox("Choisir la caméra", options=[0, 1, 2, 3, 4, 5], index=0)
+    if st.sidebar.checkbox("Caméra en direct"):
+        run_live_camera(cam_input)
+        return
+
+    # Vidéos : une image sur N et nombre d'images par passe du modèle
+    every_nth = st.sidebar.number_input("Traiter une image sur", min_value=1, max_value=60, value=1)
+    batch_size = st.sidebar.slider("Images par lot", 1, 32, 8)
 
     uploaded_file = st.file_uploader("Choisir une image ou une vidéo", type=["jpg", "jpeg", "png", "mp4"])
     if uploaded_file is not None:
-        bytes_data = uploaded_file.read()
         st.sidebar.text("Fichier chargé !")
 
         if uploaded_file.type.startswith('image/'):
             # Pour les images
+            bytes_data = uploaded_file.read()
             st.sidebar.image(bytes_data)
             frame = cv2.imdecode(np.frombuffer(bytes_data, np.uint8), cv2.IMREAD_COLOR)
             frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             frame = detect_objects(frame)
             st.image(frame, caption="Résultat de la détection", use_column_width=True)
         elif uploaded_file.type.startswith('video/'):
-            # Pour les vidéos (traitement frame par frame)
-            st.sidebar.text("Traitement de la vidéo...")
-            # Code pour traiter la vidéo frame par frame ici
-            # Note : Streamlit ne supporte pas la lecture vidéo en direct dans le navigateur pour le moment
+            # Pour les vidéos (traitement frame par frame) ; le résultat est gardé pour la session,
+            # le bouton de téléchargement relance le script sans retraiter la vidéo
+            key = (uploaded_file.name, uploaded_file.size, every_nth)
+            output = st.session_state.get("video_output")
+            if output is None or output[0] != key or not os.path.exists(output[1]):
+                st.sidebar.text("Traitement de la vidéo...")
+                # Un dossier temporaire par session, supprimé à l'arrêt du serveur ; seule la dernière
+                # vidéo annotée y reste, sur disque et non en mémoire
+                directory = st.session_state.get("video_directory")
+                if directory is None or not os.path.isdir(directory):
+                    directory = tempfile.mkdtemp(prefix="cams2_")
+                    atexit.register(shutil.rmtree, directory, True)
+                    st.session_state["video_directory"] = directory
+                for name in os.listdir(directory):
+                    os.remove(os.path.join(directory, name))
+                path = os.path.join(directory, "video" + os.path.splitext(uploaded_file.name)[1])
+                try:
+                    # Copie par blocs, lue ensuite image par image par OpenCV
+                    with open(path, "wb") as video:
+                        shutil.copyfileobj(uploaded_file, video)
+                    output_path = run_video(path, every_nth, batch_size)
+                finally:
+                    # Seule la vidéo annotée est proposée : la copie de l'entrée et le CSV des horodatages
+                    # sont supprimés, même si Streamlit interrompt le traitement
+                    for name in (path, os.path.splitext(path)[0] + "_detections.csv"):
+                        if os.path.exists(name):
+                            os.remove(name)
+                if output_path is None:
+                    return
+                st.session_state["video_output"] = (key, output_path)
+            with open(st.session_state["video_output"][1], "rb") as output:
+                st.download_button("Télécharger la vidéo annotée", output,
+                                   file_name=f"detections_{uploaded_file.name}", mime="video/mp4")
 
 if __name__ == '__main__':
     main()
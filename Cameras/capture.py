@@ -0,0 +1,176 @@
+"""
+Threaded camera capture.
+
+Each cv2.VideoCapture gets its own reader thread which keeps only the newest
+frames in a small ring buffer and drops the stale ones. The display or detection
+loop then grabs the latest frame of every camera without waiting on the sensors,
+so adding cameras no longer serializes the reads. Every frame carries the
+time.monotonic() timestamp at which it was captured (see sync.py).
+
+Usage:
+    readers = open_readers([0, 4])
+    while True:
+        frames = [reader.read()[1] for reader in readers]
+        ...
+    release_readers(readers)
+"""
+import threading
+import time
+from collections import deque
+
+from sources import open_source
+
+
+class CameraReader:
+    """
+    Reads frames from one camera on a background thread.
+
+    Args:
+    source (int | str | object): Source description for open_source() (camera index, video path,
+    image directory, "synthetic:WxH@FPS"), or an already opened capture.
+    buffer_size (int): Number of frames kept in the ring buffer; older frames are dropped.
+    name (str): Name used for the thread and in error messages.
+    decode (bool): Decode the frames. False only grabs them, which keeps the driver
+    buffer drained at little CPU cost (warm standby, see switcher.py).
+    on_frame (callable): Called on the reader thread with (frame, timestamp) for every decoded
+    frame, including those the ring buffer drops later (e.g. AsyncRecorder.write). It must not block.
+    source_args: Passed to open_source(), e.g. width=1280, height=720, fps=30, fourcc="MJPG".
+    """
+
+    def __init__(self, source, buffer_size=2, name=None, decode=True, on_frame=None, **source_args):
+        if hasattr(source, "read"):
+            self.cap = source
+        else:
+            self.cap = open_source(source, **source_args)
+        self.name = name or f"cam{source}"
+        self._frames = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self._latest = None
+        self._latest_ts = None
+        self._latest_seq = 0
+        self._returned_seq = 0
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.frames_grabbed = 0
+        self.decode = decode
+        self.on_frame = on_frame
+        self.ended = False
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def start(self):
+        """
+        Starts the reader thread. Returns the reader so it can be chained.
+        """
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while self._running:
+            # grab() seul vide le tampon du pilote sans décoder l'image
+            ret = self.cap.grab()
+            timestamp = time.monotonic()
+            if not ret:
+                # Fin du flux ou caméra débranchée
+                self.ended = True
+                break
+            self.frames_grabbed += 1
+            if not self.decode:
+                continue
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                continue
+            if self.on_frame is not None:
+                # Chaque image décodée, avant que l'anneau ne puisse l'écarter
+                self.on_frame(frame, timestamp)
+            with self._lock:
+                if len(self._frames) == self._frames.maxlen:
+                    self.frames_dropped += 1
+                self.frames_read += 1
+                self._frames.append((self.frames_read, timestamp, frame))
+
+    def read(self, fresh=False):
+        """
+        Returns the newest frame without blocking.
+
+        Args:
+        fresh (bool): If True, only return a frame that has not been returned before.
+
+        Returns:
+        (bool, numpy.ndarray): Same contract as cv2.VideoCapture.read(). ret is False when no
+        frame has been captured yet, or when fresh is True and no new frame arrived.
+        """
+        ret, frame, _ = self.read_timestamped(fresh)
+        return ret, frame
+
+    def read_timestamped(self, fresh=False):
+        """
+        Same as read(), but also returns the time.monotonic() capture timestamp of the frame.
+
+        Returns:
+        (bool, numpy.ndarray, float): ret, frame and capture timestamp (None when ret is False).
+        """
+        with self._lock:
+            if self._frames:
+                # Les images plus anciennes que la dernière ne seront jamais affichées
+                self.frames_dropped += len(self._frames) - 1
+                self._latest_seq, self._latest_ts, self._latest = self._frames[-1]
+                self._frames.clear()
+            if self._latest is None or (fresh and self._latest_seq == self._returned_seq):
+                return False, None, None
+            self._returned_seq = self._latest_seq
+            return True, self._latest, self._latest_ts
+
+    def clear(self):
+        """
+        Forgets the buffered and latest frames, so read() only returns frames captured from now on.
+        """
+        with self._lock:
+            self._frames.clear()
+            self._latest = None
+            self._latest_ts = None
+
+    def release(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.cap.release()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def open_readers(sources, buffer_size=2, **source_args):
+    """
+    Opens and starts one CameraReader per source.
+
+    Args:
+    sources (list): Source descriptions, see open_source().
+    buffer_size (int): Ring buffer size of each reader.
+    source_args: Resolution, frame rate and pixel format negotiated at open time, see open_source().
+
+    Returns:
+    readers (list): The started readers, in the same order as sources.
+    """
+    readers = []
+    for source in sources:
+        reader = CameraReader(source, buffer_size=buffer_size, **source_args)
+        if not reader.isOpened():
+            print(f'Erreur... {reader.name}')
+        readers.append(reader.start())
+    return readers
+
+
+def release_readers(readers):
+    for reader in readers:
+        reader.release()
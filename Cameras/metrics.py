@@ -0,0 +1,332 @@
+"""
+Performance metrics of the camera scripts.
+
+LatencyHistogram keeps log-spaced buckets instead of every sample, so memory stays
+constant on long runs. Percentiles are interpolated inside their bucket, so their
+error is at most one bucket width (under 5 % with the default 50 buckets per
+decade), and usually well below it.
+MetricsRegistry gathers per-camera counters (capture FPS, inference FPS, dropped
+frames, queue depth, inference latency percentiles) plus any other statistics;
+they can be drawn on the mosaic with draw_overlay() and flushed periodically to a
+JSON-lines file or served on a local Prometheus-style text endpoint.
+
+Usage:
+    registry = MetricsRegistry()
+    cam = registry.camera("cam0", reader)
+    cam.record_inference(0.012)
+    exporter = JsonLinesExporter(registry, "metrics.jsonl")
+    draw_overlay(mosaic.image, registry, mosaic)
+"""
+import bisect
+import json
+import math
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram.
+
+    Args:
+    min_seconds (float): Upper bound of the first bucket.
+    max_seconds (float): Upper bound of the last bucket; slower samples go to an overflow bucket.
+    buckets_per_decade (int): Resolution of the histogram; percentiles are within a relative
+    error of 10 ** (1 / buckets_per_decade) - 1.
+    """
+
+    def __init__(self, min_seconds=1e-4, max_seconds=10.0, buckets_per_decade=50):
+        size = math.ceil(math.log10(max_seconds / min_seconds) * buckets_per_decade)
+        self.bounds = [min_seconds * 10 ** (i / buckets_per_decade) for i in range(size + 1)]
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """
+        Returns the q-th percentile (0-100) in seconds, interpolated inside its bucket.
+        """
+        if not self.count:
+            return 0.0
+        target = q / 100 * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target and count:
+                if index == len(self.bounds):
+                    return self.max
+                # Échantillons supposés répartis uniformément (en log) dans le seau
+                fraction = (target - (cumulative - count)) / count
+                upper = self.bounds[index]
+                if index == 0:
+                    value = upper * fraction
+                else:
+                    lower = self.bounds[index - 1]
+                    value = lower * (upper / lower) ** fraction
+                return min(value, self.max)
+        return self.max
+
+    def summary(self):
+        """
+        Returns count, mean, p50, p95, p99 and max as a dictionary (times in milliseconds).
+        """
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class RateMeter:
+    """
+    Events per second, measured over consecutive windows.
+
+    Args:
+    window (float): Length of the measurement window, in seconds.
+    """
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self.total = 0
+        self._count = 0
+        self._start = time.monotonic()
+        self._rate = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, count=1):
+        with self._lock:
+            self._count += count
+            self.total += count
+
+    def set_total(self, total):
+        """
+        Feeds the meter from a cumulative counter (e.g. CameraReader.frames_read).
+        """
+        # Lecture et mise à jour sous le même verrou : l'affichage et l'export appellent tous deux
+        # snapshot(), chacun ajouterait sinon le même écart
+        with self._lock:
+            delta = total - self.total
+            self._count += delta
+            self.total = total
+
+    @property
+    def rate(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._start >= self.window:
+                self._rate = self._count / (now - self._start)
+                self._count = 0
+                self._start = now
+            return self._rate
+
+
+class CameraMetrics:
+    """
+    Performance counters of one camera.
+
+    Args:
+    name (str): Camera name, used as label in the exports.
+    reader (CameraReader): Reader whose captured and dropped frames are reported. Optional.
+    queue_depth (callable): Returns the number of packets waiting for this camera. Optional.
+    """
+
+    def __init__(self, name, reader=None, queue_depth=None):
+        self.name = name
+        self.reader = reader
+        self.queue_depth = queue_depth
+        self.capture = RateMeter()
+        self.inference = RateMeter()
+        self.latency = LatencyHistogram()
+
+    def record_inference(self, seconds):
+        self.inference.add()
+        self.latency.record(seconds)
+
+    def snapshot(self):
+        if self.reader is not None:
+            self.capture.set_total(self.reader.frames_read)
+        latency = self.latency.summary()
+        return {
+            "capture_fps": self.capture.rate,
+            "inference_fps": self.inference.rate,
+            "dropped_frames": self.reader.frames_dropped if self.reader is not None else 0,
+            "queue_depth": self.queue_depth() if self.queue_depth is not None else 0,
+            "inference_p50_ms": latency["p50_ms"],
+            "inference_p95_ms": latency["p95_ms"],
+            "inference_p99_ms": latency["p99_ms"],
+        }
+
+
+class MetricsRegistry:
+    """
+    Gathers the per-camera metrics and any other statistics (pipeline, synchronizer...).
+
+    Usage:
+        registry = MetricsRegistry()
+        cam = registry.camera("cam0", reader)
+        registry.add_source("pipeline", pipeline.stats)
+        print(registry.snapshot())
+    """
+
+    def __init__(self):
+        self.cameras = {}
+        self.sources = {}
+
+    def camera(self, name, reader=None, queue_depth=None):
+        """
+        Returns the CameraMetrics of a camera, creating it on first use.
+        """
+        if name not in self.cameras:
+            self.cameras[name] = CameraMetrics(name, reader, queue_depth)
+        return self.cameras[name]
+
+    def add_source(self, name, func):
+        """
+        Adds a callable returning a dictionary of statistics to every snapshot.
+        """
+        self.sources[name] = func
+
+    def snapshot(self):
+        snapshot = {"time": time.time(),
+                    "cameras": {name: camera.snapshot() for name, camera in self.cameras.items()}}
+        for name, func in self.sources.items():
+            snapshot[name] = func()
+        return snapshot
+
+
+def draw_overlay(image, registry, mosaic=None, color=(255, 255, 255)):
+    """
+    Draws the metrics of each camera on the image, in the corner of its mosaic tile.
+
+    Args:
+    image (numpy.ndarray): Image to draw on, usually Mosaic.image.
+    registry (MetricsRegistry): Metrics to display; cameras are drawn in registration order.
+    mosaic (Mosaic): Gives the position of each camera tile. None draws all cameras at the top left.
+    """
+    y_offset = 0
+    for index, (name, camera) in enumerate(registry.cameras.items()):
+        x, y = mosaic.tile_origin(index) if mosaic is not None else (0, y_offset)
+        stats = camera.snapshot()
+        lines = [
+            f"{name} cap {stats['capture_fps']:.1f} fps  inf {stats['inference_fps']:.1f} fps",
+            f"drop {stats['dropped_frames']}  queue {stats['queue_depth']}",
+            f"p50 {stats['inference_p50_ms']:.0f}  p95 {stats['inference_p95_ms']:.0f}"
+            f"  p99 {stats['inference_p99_ms']:.0f} ms",
+        ]
+        for line in lines:
+            y += 18
+            # Contour noir pour rester lisible sur n'importe quelle image
+            cv2.putText(image, line, (x + 6, y), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 0, 0), 3, cv2.LINE_AA)
+            cv2.putText(image, line, (x + 6, y), cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1, cv2.LINE_AA)
+        y_offset = y + 6
+    return image
+
+
+class JsonLinesExporter:
+    """
+    Appends a registry snapshot to a JSON-lines file every interval seconds.
+
+    Args:
+    registry (MetricsRegistry): Metrics to export.
+    path (str): Output file, opened in append mode.
+    interval (float): Seconds between two snapshots.
+    """
+
+    def __init__(self, registry, path, interval=10.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-jsonl", daemon=True)
+        self._thread.start()
+
+    def flush(self):
+        with open(self.path, "a") as file:
+            file.write(json.dumps(self.registry.snapshot()) + "\n")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def close(self):
+        """
+        Stops the exporter after writing a last snapshot.
+        """
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+
+def _prometheus_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def prometheus_text(snapshot):
+    """
+    Formats a registry snapshot in the Prometheus text exposition format.
+    """
+    lines = []
+    for camera, stats in snapshot["cameras"].items():
+        for key, value in stats.items():
+            lines.append(f'camera_{key}{{camera="{camera}"}} {value}')
+    for source, stats in snapshot.items():
+        if source in ("time", "cameras") or not isinstance(stats, dict):
+            continue
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                # Statistiques imbriquées (ex. une entrée par étape du pipeline)
+                for sub_key, sub_value in value.items():
+                    lines.append(f'{_prometheus_name(source)}_{_prometheus_name(sub_key)}{{key="{key}"}} {sub_value}')
+            elif isinstance(value, (int, float)):
+                lines.append(f"{_prometheus_name(source)}_{_prometheus_name(key)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusExporter:
+    """
+    Serves the registry on http://host:port/metrics in the Prometheus text format.
+
+    Args:
+    registry (MetricsRegistry): Metrics to export.
+    port (int): TCP port of the endpoint.
+    host (str): Interface to listen on; local only by default.
+    """
+
+    def __init__(self, registry, port=9108, host="127.0.0.1"):
+        exporter_registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = prometheus_text(exporter_registry.snapshot()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
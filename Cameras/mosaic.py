@@ -0,0 +1,95 @@
+"""
+N-camera mosaic compositor.
+
+The mosaic image is allocated once; every camera owns a fixed slice (tile) of it and
+frames are resized straight into their tile with cv2.resize(dst=...). The display loop
+therefore makes no large allocation per frame, whatever the number of cameras.
+
+Usage:
+    mosaic = Mosaic(4, layout="2x2", tile_size=(640, 480))
+    cv2.imshow("Cameras", mosaic.compose([frame1, frame2, frame3, frame4]))
+"""
+import math
+
+import cv2
+import numpy as np
+
+
+def parse_layout(layout, count):
+    """
+    Converts a layout description into a (rows, cols) grid.
+
+    Args:
+    layout (str | tuple | None): "2x2", "3x3", "1xN", (rows, cols) or None for an automatic near-square grid.
+    count (int): Number of cameras to place.
+
+    Returns:
+    (int, int): Number of rows and columns of the grid.
+    """
+    if layout is None:
+        cols = math.ceil(math.sqrt(count))
+        rows = math.ceil(count / cols)
+    elif isinstance(layout, str):
+        rows, cols = layout.lower().split("x")
+        rows = count if rows == "n" else int(rows)
+        cols = count if cols == "n" else int(cols)
+    else:
+        rows, cols = layout
+    if rows * cols < count:
+        raise ValueError(f"Layout {rows}x{cols} cannot hold {count} cameras")
+    return rows, cols
+
+
+class Mosaic:
+    """
+    Composes several camera frames into one preallocated grid image.
+
+    Args:
+    count (int): Number of cameras.
+    layout (str | tuple | None): Grid layout, see parse_layout().
+    tile_size (tuple): (width, height) of each camera tile.
+    """
+
+    def __init__(self, count, layout=None, tile_size=(640, 480)):
+        self.rows, self.cols = parse_layout(layout, count)
+        self.tile_size = tuple(tile_size)
+        width, height = self.tile_size
+        self.image = np.zeros((self.rows * height, self.cols * width, 3), np.uint8)
+        # Vues (sans copie) sur la mosaïque, une par caméra
+        self.tiles = []
+        for index in range(count):
+            row, col = divmod(index, self.cols)
+            self.tiles.append(self.image[row * height:(row + 1) * height, col * width:(col + 1) * width])
+
+    def tile_origin(self, index):
+        """
+        Returns the (x, y) pixel position of the top-left corner of a camera tile.
+        """
+        row, col = divmod(index, self.cols)
+        return col * self.tile_size[0], row * self.tile_size[1]
+
+    def put(self, index, frame):
+        """
+        Writes one frame into its tile. None leaves the previous content in place.
+        """
+        if frame is None:
+            return
+        tile = self.tiles[index]
+        if frame.shape[:2] == tile.shape[:2]:
+            np.copyto(tile, frame)
+        else:
+            cv2.resize(frame, self.tile_size, dst=tile, interpolation=cv2.INTER_AREA)
+
+    def compose(self, frames):
+        """
+        Writes every frame into its tile and returns the mosaic image.
+
+        Args:
+        frames (list): One BGR frame (or None) per camera.
+
+        Returns:
+        numpy.ndarray: The mosaic buffer. It is reused by the next call.
+        """
+        for index, frame in enumerate(frames):
+            self.put(index, frame)
+        return self.image
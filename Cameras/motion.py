@@ -0,0 +1,105 @@
+"""
+Motion gate: skip inference on static frames.
+
+A camera watching an empty corridor does not need a forward pass per frame. The
+gate compares a tiny grayscale copy of each frame (160 pixels wide by default)
+with the previous one, or feeds it to a MOG2 background subtractor, and lets the
+detector run only when the ratio of changed pixels crosses a threshold. Working on
+the downscaled copy keeps the gate well under a millisecond per frame; the last
+detections are reused for the skipped frames.
+
+Usage:
+    gate = MotionGate()
+    if gate.check(frame):
+        results = model(frame)
+    print(gate.stats())
+"""
+import time
+
+import cv2
+import numpy as np
+
+METHODS = ("diff", "mog2")
+
+
+class MotionGate:
+    """
+    Decides, frame by frame, whether a camera saw enough change to run the detector.
+
+    Args:
+    method (str): "diff" (difference with the previous frame) or "mog2" (background subtractor).
+    width (int): Width of the downscaled frame the gate works on.
+    ratio_threshold (float): Ratio of changed pixels (0-1) above which the frame is considered moving.
+    pixel_threshold (int): Gray level difference for a pixel to count as changed ("diff" only).
+    max_skip (int): Force a detection after this many skipped frames (None: never).
+    """
+
+    def __init__(self, method="diff", width=160, ratio_threshold=0.01, pixel_threshold=25, max_skip=None):
+        if method not in METHODS:
+            raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+        self.method = method
+        self.width = width
+        self.ratio_threshold = ratio_threshold
+        self.pixel_threshold = pixel_threshold
+        self.max_skip = max_skip
+        self._subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False) if method == "mog2" else None
+        self._small = None
+        self._gray = None
+        self._previous = None
+        self._diff = None
+        self._skipped = 0
+        self.last_ratio = 0.0
+        self.frames = 0
+        self.inferences = 0
+        self.gate_seconds = 0.0
+
+    def _allocate(self, frame):
+        height = max(1, round(frame.shape[0] * self.width / frame.shape[1]))
+        # Tampons réduits alloués une seule fois par caméra
+        self._small = np.empty((height, self.width, 3), np.uint8)
+        self._gray = np.empty((height, self.width), np.uint8)
+        self._diff = np.empty((height, self.width), np.uint8)
+
+    def _changed_ratio(self, frame):
+        if self._small is None:
+            self._allocate(frame)
+        cv2.resize(frame, (self.width, self._small.shape[0]), dst=self._small, interpolation=cv2.INTER_NEAREST)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        cv2.GaussianBlur(self._gray, (3, 3), 0, dst=self._gray)
+        if self._subtractor is not None:
+            mask = self._subtractor.apply(self._gray)
+            return cv2.countNonZero(mask) / mask.size
+        if self._previous is None:
+            self._previous = self._gray.copy()
+            return 1.0
+        cv2.absdiff(self._gray, self._previous, dst=self._diff)
+        self._previous, self._gray = self._gray, self._previous
+        cv2.threshold(self._diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self._diff)
+        return cv2.countNonZero(self._diff) / self._diff.size
+
+    def check(self, frame):
+        """
+        Returns True when the detector should run on this frame.
+        """
+        start = time.perf_counter()
+        self.last_ratio = self._changed_ratio(frame)
+        moving = self.last_ratio >= self.ratio_threshold
+        if not moving and self.max_skip is not None and self._skipped >= self.max_skip:
+            moving = True
+        self._skipped = 0 if moving else self._skipped + 1
+        self.frames += 1
+        self.inferences += moving
+        self.gate_seconds += time.perf_counter() - start
+        return moving
+
+    def stats(self):
+        """
+        Returns the gate counters as a dictionary, including the fraction of inferences saved.
+        """
+        return {
+            "frames": self.frames,
+            "inferences": self.inferences,
+            "saved_ratio": 1 - self.inferences / self.frames if self.frames else 0.0,
+            "gate_mean_ms": self.gate_seconds / self.frames * 1000 if self.frames else 0.0,
+            "last_ratio": self.last_ratio,
+        }
@@ -3,14 +3,14 @@ pip install opencv-python
 """
 import cv2
 
-camera1 = cv2.VideoCapture(0)
-camera2 = cv2.VideoCapture(4)
+from capture import open_readers, release_readers
+from mosaic import Mosaic
 
-if not camera1.isOpened():
-    print('erreur ...cam1')
+# Un thread de lecture par caméra : la boucle d'affichage n'attend plus les capteurs
+camera1, camera2 = open_readers([0, 4])
 
-if not camera2.isOpened():
-    print('erreur.. cam2')
+# Mosaïque allouée une seule fois, chaque caméra est redimensionnée dans sa case
+mosaic = Mosaic(2, layout="1xN", tile_size=(640, 480))
 
 
 
@@ -18,19 +18,15 @@ while True:
     ret1, frame1 = camera1.read()
     ret2, frame2 = camera2.read()
 
+    if ret1 or ret2:
+        frame = mosaic.compose([frame1, frame2])
 
-    frame = cv2.hconcat([frame1, frame2])
-
-    cv2.imshow("Cameras",frame)
+        cv2.imshow("Cameras",frame)
 
 
 
     if cv2.waitKey(1) & 0xff == ord('q'):
         break
 
-camera1.release()
-camera2.release()
-
-
-
-
+release_readers([camera1, camera2])
+cv2.destroyAllWindows()
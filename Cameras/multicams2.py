@@ -4,19 +4,26 @@ and continuously display the images from the two cameras side by side in the win
 The loop will run until the user presses the 'q' key, at which point the cameras will be released and the window will be destroyed.
 """
 import cv2
-import numpy as np
-# Initialize the two cameras
-cam1 = cv2.VideoCapture(0)
-cam2 = cv2.VideoCapture(1)
+
+from mosaic import Mosaic
+from sources import open_source
 
 # Set the window name and size
 window_name = "Cameras"
 window_size = (640, 480)
 
+# Initialize the two cameras, asking them directly for the window size in MJPG
+# (frames are only resized if a camera refuses this resolution)
+cam1 = open_source(0, width=window_size[0], height=window_size[1], fourcc="MJPG")
+cam2 = open_source(1, width=window_size[0], height=window_size[1], fourcc="MJPG")
+
 # Create a window to display the images
 cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
 cv2.resizeWindow(window_name, window_size)
 
+# The combined image is allocated once; each camera is resized straight into its half
+mosaic = Mosaic(2, layout="1xN", tile_size=window_size)
+
 while True:
     # Read frames from the cameras
     ret1, frame1 = cam1.read()
@@ -26,15 +33,8 @@ while True:
     if not (ret1 and ret2):
         break
 
-    # Resize the images to fit the window size
-    frame1 = cv2.resize(frame1, window_size)
-    frame2 = cv2.resize(frame2, window_size)
-
-    # Create a blank image with the same size as the window
-    blank_image = np.zeros((window_size[1], window_size[0], 3), np.uint8)
-
-    # Add the two images side by side
-    combined_image = np.concatenate((frame1, frame2), axis=1)
+    # Copy the two images side by side into the preallocated mosaic
+    combined_image = mosaic.compose([frame1, frame2])
 
     # Display the combined image
     cv2.imshow(window_name, combined_image)
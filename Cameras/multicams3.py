@@ -1,14 +1,31 @@
 """
 This code will open two video capture objects, one for each camera, and display the frames side by side in a single window.
- It will also write the frames to two separate video files, "cam1.avi" and "cam2.avi". The loop will continue until the user presses the "q" key,
+ It will also record the frames of each camera to segmented video files, "cam1_000.avi", "cam1_001.avi", ... and "cam2_000.avi", ...
+ The encoding runs on background threads so it never stalls the display, and every segment gets a CSV with the real
+ capture timestamps of its frames. The loop will continue until the user presses the "q" key,
 at which point the video capture and video writer objects will be released and all the windows will be destroyed.
 """
 import cv2
 
+from capture import CameraReader, release_readers
+from recorder import AsyncRecorder
 
-# Set up the video capture objects for each camera
-cam1 = cv2.VideoCapture(0)
-cam2 = cv2.VideoCapture(1)
+
+# Set up the asynchronous video writers for each camera: a new file every 10 minutes,
+# the frame rate is measured from the capture timestamps instead of assuming 30 fps
+out1 = AsyncRecorder("cam1_{index:03d}.avi", fourcc="MJPG", segment_seconds=600)
+out2 = AsyncRecorder("cam2_{index:03d}.avi", fourcc="MJPG", segment_seconds=600)
+
+# Set up the threaded video capture objects for each camera; the resolution, frame rate
+# and pixel format are negotiated with the cameras when they are opened. Every captured
+# frame is handed to the recorder by the reader thread itself, so none is lost while the
+# display loop is busy
+cam1 = CameraReader(0, name="cam0", on_frame=out1.write, width=1280, height=720, fps=30, fourcc="MJPG")
+cam2 = CameraReader(1, name="cam1", on_frame=out2.write, width=1280, height=720, fps=30, fourcc="MJPG")
+for cam in (cam1, cam2):
+    if not cam.isOpened():
+        print(f'Erreur... {cam.name}')
+    cam.start()
 
 # Set the window name
 window_name = "Multi-Camera Display"
@@ -19,40 +36,32 @@ cv2.namedWindow(window_name)
 # Set up the position of the windows for the two cameras
 cv2.moveWindow(window_name, 0, 1)
 
-# Set the width and height of the frames
-frame_width = int(cam1.get(cv2.CAP_PROP_FRAME_WIDTH))
-frame_height = int(cam1.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-# Set up the video writers for each camera
-out1 = cv2.VideoWriter("cam1.avi", cv2.VideoWriter_fourcc(*'MJPG'), 30, (frame_width, frame_height))
-out2 = cv2.VideoWriter("cam2.avi", cv2.VideoWriter_fourcc(*'MJPG'), 30, (frame_width, frame_height))
-
 # Start the main loop
 while True:
-    # Read the frames from each camera
-    ret1, frame1 = cam1.read()
-    ret2, frame2 = cam2.read()
-
-    # Check if the frames are valid
-    if not ret1 or not ret2:
+    # Check if the cameras are still delivering frames
+    if cam1.ended or cam2.ended:
         break
 
-    # Write the frames to the video writers
-    out1.write(frame1)
-    out2.write(frame2)
-
-    # Display the frames side by side
-    cv2.imshow(window_name, cv2.hconcat([frame1, frame2]))
+    # Display the latest recorded frames side by side
+    ret1, frame1 = cam1.read()
+    ret2, frame2 = cam2.read()
+    if ret1 and ret2:
+        cv2.imshow(window_name, cv2.hconcat([frame1, frame2]))
 
     # Check if the user pressed "q" to quit
     if cv2.waitKey(1) & 0xFF == ord("q"):
         break
 
 # Release the video capture and video writer objects
-cam1.release()
-cam2.release()
+release_readers([cam1, cam2])
 out1.release()
 out2.release()
+for name, out in (("cam1", out1), ("cam2", out2)):
+    stats = out.stats()
+    print(f"{name}:", stats)
+    if stats["frames_dropped"]:
+        # File de l'encodeur pleine : le disque ou le codec ne suit pas la caméra
+        print(f"Attention : {stats['frames_dropped']} images de {name} non enregistrées")
 
 # Destroy all the windows
 cv2.destroyAllWindows()
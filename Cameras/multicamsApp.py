@@ -1,48 +1,42 @@
 """
 Here is some sample code that displays images from multiple cameras in a single window using OpenCV and Python.
- The code includes buttons that allow the user to switch between the different cameras.
- This code assumes that you have two cameras connected to your system.
-  You can modify the code to add more cameras by creating additional trackbars and video capture objects.
+ The code includes a trackbar that allows the user to switch between the different cameras.
+ Every camera stays in warm standby: inactive cameras are only grabbed (their driver buffer stays empty, nothing is decoded),
+ so switching is instant and shows a fresh frame.
+  You can add more cameras by adding their index to the CAMERAS list.
 """
 import cv2
-import numpy as np
 
-# Create a window to display the images
-cv2.namedWindow("Cameras")
+from switcher import CameraSwitcher
 
-# Define the callback function for the buttons
-def switch_camera(x):
-    global current_camera
-    current_camera = x
+# Cameras to switch between
+CAMERAS = [0, 1]
 
-# Create buttons for switching between cameras
-cv2.createTrackbar("Camera 1", "Cameras", 0, 1, switch_camera)
-cv2.createTrackbar("Camera 2", "Cameras", 0, 1, switch_camera)
+# Create a window to display the images
+cv2.namedWindow("Cameras")
 
-# Set the current camera to camera 1
-current_camera = 1
+# Open all the cameras, the first one is active
+switcher = CameraSwitcher(CAMERAS, active=0)
 
-# Open the first camera
-cap1 = cv2.VideoCapture(0)
+# Define the callback function for the trackbar
+def switch_camera(x):
+    switcher.switch(x)
 
-# Open the second camera
-cap2 = cv2.VideoCapture(1)
+# Create a trackbar for switching between cameras
+cv2.createTrackbar("Camera", "Cameras", 0, len(CAMERAS) - 1, switch_camera)
 
 while True:
-    # Capture frame-by-frame
-    if current_camera == 1:
-        ret, frame = cap1.read()
-    else:
-        ret, frame = cap2.read()
+    # Get the latest frame of the active camera
+    ret, frame = switcher.read()
 
     # Display the resulting frame
-    cv2.imshow('Cameras', frame)
+    if ret:
+        cv2.imshow('Cameras', frame)
 
     # Press 'q' to quit
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
 
 # When everything done, release the capture
-cap1.release()
-cap2.release()
+switcher.release()
 cv2.destroyAllWindows()
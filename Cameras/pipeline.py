@@ -0,0 +1,188 @@
+"""
+Pipelined capture -> preprocess -> infer -> render -> display.
+
+Each stage runs on its own worker thread(s) behind a bounded queue, so capture,
+inference and rendering of consecutive frames overlap instead of running one
+after the other. OpenCV and PyTorch release the GIL in their heavy calls, which
+is what makes threads worthwhile here. The display (sink) stays on the calling
+thread because cv2.imshow and Streamlit must be driven from the main thread.
+
+Packets are plain dictionaries. The capture function returns a new packet with
+at least a "timestamp" key (time.monotonic() capture time), or None when no frame
+is ready yet, and raises EndOfStream at the end of the source. Each stage function
+receives a packet and returns it (or None to drop it). The sink returns False to
+stop the pipeline.
+
+Every stage keeps a latency histogram (p50/p95/p99) and the glass-to-glass
+latency is measured from the capture timestamp to the end of the sink.
+
+Usage:
+    pipeline = Pipeline(capture, [Stage("infer", infer), Stage("render", render)], display)
+    pipeline.run()
+    print(pipeline.stats())
+"""
+import queue
+import threading
+import time
+
+from metrics import LatencyHistogram
+
+_END = object()
+
+
+class EndOfStream(Exception):
+    """
+    Raised by a capture function when its source has no more frames.
+    """
+
+
+class Stage:
+    """
+    One processing step of a Pipeline.
+
+    Args:
+    name (str): Name used in the statistics.
+    func (callable): Takes a packet and returns it, or None to drop it.
+    workers (int): Number of threads running func. Stateful stages must keep 1.
+    queue_size (int): Size of the input queue of the stage.
+    drop_oldest (bool): When the input queue is full, discard its oldest packet instead of waiting.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=2, drop_oldest=True):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.drop_oldest = drop_oldest
+        self.latency = LatencyHistogram()
+        self.dropped = 0
+        self._alive = workers
+        self._lock = threading.Lock()
+
+    def put(self, packet):
+        if not self.drop_oldest:
+            self.queue.put(packet)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(packet)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class Pipeline:
+    """
+    Runs a capture function, a chain of stages and a sink concurrently.
+
+    Args:
+    capture (callable): Returns a packet dict, None when no frame is ready, or raises EndOfStream.
+    stages (list): Stage objects, in processing order.
+    sink (callable): Called on the calling thread with each finished packet; returns False to stop.
+    sink_queue_size (int): Size of the queue in front of the sink.
+    """
+
+    def __init__(self, capture, stages, sink, sink_queue_size=2):
+        self.capture = capture
+        self.sink = sink
+        self.capture_stage = Stage("capture", None)
+        self.sink_stage = Stage("display", None, queue_size=sink_queue_size)
+        self.stages = list(stages)
+        self.glass_to_glass = LatencyHistogram()
+        self._threads = []
+        self._running = False
+        self._last_seq = -1
+
+    def _next(self, index):
+        return self.stages[index + 1] if index + 1 < len(self.stages) else self.sink_stage
+
+    def _capture_loop(self):
+        first = self.stages[0] if self.stages else self.sink_stage
+        seq = 0
+        while self._running:
+            start = time.perf_counter()
+            try:
+                packet = self.capture()
+            except EndOfStream:
+                break
+            if packet is None:
+                time.sleep(0.001)
+                continue
+            self.capture_stage.latency.record(time.perf_counter() - start)
+            packet["seq"] = seq
+            seq += 1
+            first.put(packet)
+        for _ in range(first.workers):
+            first.queue.put(_END)
+
+    def _stage_loop(self, index):
+        stage = self.stages[index]
+        target = self._next(index)
+        while True:
+            packet = stage.queue.get()
+            if packet is _END:
+                break
+            start = time.perf_counter()
+            packet = stage.func(packet)
+            stage.latency.record(time.perf_counter() - start)
+            if packet is not None:
+                target.put(packet)
+        # Le dernier worker d'une étape propage la fin de flux à l'étape suivante
+        with stage._lock:
+            stage._alive -= 1
+            last = stage._alive == 0
+        if last:
+            for _ in range(target.workers):
+                target.queue.put(_END)
+
+    def start(self):
+        self._running = True
+        self._threads = [threading.Thread(target=self._capture_loop, name="capture", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            stage._alive = stage.workers
+            for worker in range(stage.workers):
+                self._threads.append(threading.Thread(target=self._stage_loop, args=(index,),
+                                                      name=f"{stage.name}-{worker}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def run(self):
+        """
+        Starts the pipeline and feeds the sink until the source ends or the sink returns False.
+        """
+        self.start()
+        try:
+            while True:
+                packet = self.sink_stage.queue.get()
+                if packet is _END:
+                    break
+                # Avec plusieurs workers les paquets peuvent se doubler : ne jamais revenir en arrière
+                if packet["seq"] < self._last_seq:
+                    self.sink_stage.dropped += 1
+                    continue
+                self._last_seq = packet["seq"]
+                start = time.perf_counter()
+                keep_going = self.sink(packet)
+                self.sink_stage.latency.record(time.perf_counter() - start)
+                self.glass_to_glass.record(time.monotonic() - packet["timestamp"])
+                if keep_going is False:
+                    break
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._running = False
+
+    def stats(self):
+        """
+        Returns the latency summary and drop count of every stage, and the glass-to-glass latency.
+        """
+        stats = {}
+        for stage in [self.capture_stage] + self.stages + [self.sink_stage]:
+            stats[stage.name] = dict(stage.latency.summary(), dropped=stage.dropped)
+        stats["glass_to_glass"] = self.glass_to_glass.summary()
+        return stats
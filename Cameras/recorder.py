@@ -0,0 +1,182 @@
+"""
+Asynchronous, segmented video recording.
+
+cv2.VideoWriter.write() encodes on the calling thread: MJPG at 1080p stalls the
+display loop and frames get dropped. AsyncRecorder moves the encoding to its own
+thread behind a bounded queue (OpenCV releases the GIL while encoding, so a thread
+is enough), rotates the output files by duration or size, and stores the real
+capture timestamp of every frame in a CSV next to each segment so playback timing
+can be restored even when the camera does not deliver its nominal frame rate.
+
+Backpressure policies when the queue is full:
+    "drop_oldest"  Discard the oldest queued frame (default, keeps the recording live).
+    "drop_newest"  Discard the incoming frame.
+    "block"        Make write() wait for the encoder.
+
+Usage:
+    recorder = AsyncRecorder("cam1_{index:03d}.avi", segment_seconds=600)
+    recorder.write(frame, timestamp)
+    print(recorder.stats())
+    recorder.release()
+"""
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class AsyncRecorder:
+    """
+    Writes frames to rotating video files on a background thread.
+
+    Args:
+    path_pattern (str): Output path, formatted with the segment number, e.g. "cam1_{index:03d}.avi".
+    fourcc (str): Four character code of the codec.
+    fps (float): Frame rate written in the file header. None measures it from the frame timestamps.
+    queue_size (int): Maximum number of frames waiting to be encoded.
+    policy (str): Backpressure policy, one of "drop_oldest", "drop_newest" or "block".
+    segment_seconds (float): Start a new file after this many seconds of video (None: never).
+    segment_bytes (int): Start a new file once the current one reaches this size (None: never).
+    warmup_frames (int): Frames buffered before the first file is opened, to measure the frame rate.
+    """
+
+    def __init__(self, path_pattern, fourcc="MJPG", fps=None, queue_size=64, policy="drop_oldest",
+                 segment_seconds=None, segment_bytes=None, warmup_frames=15):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}")
+        self.path_pattern = path_pattern
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.fps = fps
+        self.policy = policy
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.warmup_frames = warmup_frames
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self._timestamps_file = None
+        self._segment_start = None
+        self._segment_frames = 0
+        self._last_timestamp = None
+        self._segment_index = 0
+        self._first_timestamps = []
+        self.path = None
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.max_queue_depth = 0
+        self.encode_seconds = 0.0
+        self.segments = []
+        self._thread = threading.Thread(target=self._run, name=f"recorder:{path_pattern}", daemon=True)
+        self._thread.start()
+
+    def write(self, frame, timestamp=None):
+        """
+        Queues a frame for encoding. Never blocks unless the policy is "block".
+
+        Args:
+        frame (numpy.ndarray): BGR frame. It must not be modified after the call.
+        timestamp (float): time.monotonic() capture time of the frame; defaults to now.
+        """
+        item = (frame, time.monotonic() if timestamp is None else timestamp)
+        if self.policy == "block":
+            self._queue.put(item)
+        else:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.frames_dropped += 1
+                if self.policy == "drop_oldest":
+                    try:
+                        self._queue.get_nowait()
+                    except queue.Empty:
+                        pass
+                    self._queue.put_nowait(item)
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+    def stats(self):
+        """
+        Returns the recorder metrics as a dictionary.
+        """
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "frames_written": self.frames_written,
+            "frames_dropped": self.frames_dropped,
+            "encode_fps": self.frames_written / self.encode_seconds if self.encode_seconds else 0.0,
+            "segments": len(self.segments),
+        }
+
+    def _measured_fps(self):
+        if self._writer is None:
+            count, duration = len(self._first_timestamps) - 1, 0.0
+            if count > 0:
+                duration = self._first_timestamps[-1] - self._first_timestamps[0]
+        else:
+            # Cadence mesurée sur le segment qui se termine
+            count, duration = self._segment_frames - 1, self._last_timestamp - self._segment_start
+        return count / duration if count > 0 and duration > 0 else 30.0
+
+    def _open_segment(self, frame, timestamp, fps):
+        self._close_segment()
+        self._segment_frames = 0
+        self.path = self.path_pattern.format(index=self._segment_index)
+        height, width = frame.shape[:2]
+        self._writer = cv2.VideoWriter(self.path, self.fourcc, fps, (width, height))
+        # Horodatage réel de chaque image, relatif au début du segment
+        self._timestamps_file = open(os.path.splitext(self.path)[0] + ".csv", "w")
+        self._timestamps_file.write("frame,timestamp,seconds\n")
+        self._segment_start = timestamp
+        self._segment_index += 1
+        self.segments.append(self.path)
+
+    def _close_segment(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._timestamps_file.close()
+            self._writer = None
+
+    def _needs_rotation(self, timestamp):
+        if self.segment_seconds is not None and timestamp - self._segment_start >= self.segment_seconds:
+            return True
+        if self.segment_bytes is not None and os.path.getsize(self.path) >= self.segment_bytes:
+            return True
+        return False
+
+    def _encode(self, frame, timestamp):
+        if self._writer is None or self._needs_rotation(timestamp):
+            fps = self.fps or self._measured_fps()
+            self._open_segment(frame, timestamp, fps)
+        start = time.perf_counter()
+        self._writer.write(frame)
+        self.encode_seconds += time.perf_counter() - start
+        self._timestamps_file.write(f"{self._segment_frames},{timestamp:.6f},{timestamp - self._segment_start:.6f}\n")
+        self._segment_frames += 1
+        self._last_timestamp = timestamp
+        self.frames_written += 1
+
+    def _run(self):
+        warmup = []
+        while True:
+            item = self._queue.get()
+            if item is not None and len(self._first_timestamps) < self.warmup_frames and self.fps is None:
+                # Mesurer la cadence réelle de la caméra avant d'ouvrir le premier fichier
+                warmup.append(item)
+                self._first_timestamps.append(item[1])
+                continue
+            for frame, timestamp in warmup:
+                self._encode(frame, timestamp)
+            warmup = []
+            if item is None:
+                break
+            self._encode(*item)
+        self._close_segment()
+
+    def release(self):
+        """
+        Encodes the frames still queued, then closes the current segment.
+        """
+        self._queue.put(None)
+        self._thread.join()
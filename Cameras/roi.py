@@ -0,0 +1,121 @@
+"""
+Per-camera regions of interest.
+
+Most cameras only watch a doorway or a conveyor. Instead of sending the whole frame
+to the detector, each camera gets one or more regions (x, y, width, height, in pixels
+or as fractions of the frame). Only the crops are batched into the model, and their
+boxes are shifted back to full-frame coordinates. The inference size follows the
+largest crop (up to the model input size), so a small region keeps its native
+resolution instead of being downscaled with the whole frame.
+
+Regions of the same camera should not overlap, otherwise an object in the overlap is
+detected twice.
+
+Usage:
+    regions = RegionsOfInterest([[(0.3, 0.2, 0.4, 0.8)], None], count=2)
+    crops, origins = regions.crop(frames)
+    results = model(crops, size=regions.inference_size(crops))
+    detections = regions.merge([boxes.cpu().numpy() for boxes in results.xyxy], origins)
+"""
+import math
+
+import cv2
+import numpy as np
+
+# Yolov5/rendering.py : le script appelant ajoute le dossier Yolov5 au chemin
+from rendering import default_renderer
+
+
+class RegionsOfInterest:
+    """
+    Crops the regions of interest of every camera and maps the detections back.
+
+    Args:
+    regions (list): One entry per camera: a list of (x, y, width, height) regions, or None for the
+    whole frame. Values <= 1 are fractions of the frame size. Missing entries mean the whole frame.
+    count (int): Number of cameras.
+    """
+
+    def __init__(self, regions, count):
+        regions = list(regions or [])
+        self.regions = [regions[index] if index < len(regions) else None for index in range(count)]
+        self._pixels = {}
+
+    def rectangles(self, camera, shape):
+        """
+        Returns the (x, y, width, height) pixel rectangles of a camera for a frame shape.
+        """
+        key = (camera, shape[:2])
+        rectangles = self._pixels.get(key)
+        if rectangles is None:
+            height, width = shape[:2]
+            rectangles = []
+            for region in self.regions[camera] or [(0, 0, width, height)]:
+                x, y, w, h = region
+                if all(value <= 1 for value in region):
+                    # Fractions de l'image
+                    x, y, w, h = x * width, y * height, w * width, h * height
+                x0, y0 = max(int(x), 0), max(int(y), 0)
+                x1, y1 = min(int(x + w), width), min(int(y + h), height)
+                if x1 > x0 and y1 > y0:
+                    rectangles.append((x0, y0, x1 - x0, y1 - y0))
+            self._pixels[key] = rectangles
+        return rectangles
+
+    def crop(self, frames, cameras=None):
+        """
+        Cuts the regions out of the frames (views, no copy).
+
+        Args:
+        frames (list): One frame per camera.
+        cameras (list): Indices of the cameras to crop, None for all of them.
+
+        Returns:
+        (list, list): The crops, and for each crop the (camera, x, y) of its top-left corner.
+        """
+        crops, origins = [], []
+        for camera in range(len(frames)) if cameras is None else cameras:
+            frame = frames[camera]
+            for x, y, w, h in self.rectangles(camera, frame.shape):
+                crops.append(frame[y:y + h, x:x + w])
+                origins.append((camera, x, y))
+        return crops, origins
+
+    @staticmethod
+    def inference_size(crops, max_size=640, stride=32):
+        """
+        Returns the model input size: the largest crop side rounded up to the stride, at most max_size.
+        """
+        largest = max((max(crop.shape[:2]) for crop in crops), default=max_size)
+        return min(max_size, math.ceil(largest / stride) * stride)
+
+    def merge(self, detections, origins):
+        """
+        Shifts the detections of every crop to full-frame coordinates and groups them by camera.
+
+        Args:
+        detections (list): One (n, 6) array per crop: x1, y1, x2, y2, confidence, class.
+        origins (list): The origins returned by crop().
+
+        Returns:
+        list: One (n, 6) array per camera, None for the cameras that were not cropped.
+        """
+        merged = [None] * len(self.regions)
+        for boxes, (camera, x, y) in zip(detections, origins):
+            boxes = np.array(boxes, np.float32).reshape(-1, 6)
+            boxes[:, [0, 2]] += x
+            boxes[:, [1, 3]] += y
+            merged[camera] = boxes if merged[camera] is None else np.concatenate([merged[camera], boxes])
+        return merged
+
+    def annotate(self, frame, camera, detections, names, color=(0, 255, 0), region_color=(255, 128, 0)):
+        """
+        Draws the regions of a camera and its detections on a frame in place and returns it.
+        """
+        if self.regions[camera]:
+            for x, y, w, h in self.rectangles(camera, frame.shape):
+                cv2.rectangle(frame, (x, y), (x + w, y + h), region_color, 1)
+        if detections is not None:
+            # Même rendu que les applications Streamlit, libellés en cache
+            default_renderer.draw(frame, detections, names, color, 2)
+        return frame
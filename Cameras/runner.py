@@ -0,0 +1,120 @@
+"""
+Shared setup of the multi-camera detection scripts (cams1.py, V8/detect2.py).
+
+Both scripts pair the frames of their cameras by timestamp, run them through a
+Pipeline, compose a mosaic with the metrics overlay (or count frames when running
+headless) and export the metrics to a JSON-lines file. MultiCameraRunner holds
+that part; the scripts only provide their detection stages.
+
+Environment variables: HEADLESS=1 counts the frames instead of displaying them,
+for DURATION seconds when it is set.
+
+Usage:
+    runner = MultiCameraRunner(open_readers(sources_from_env([0, 4])))
+    infer_stage = Stage("infer", infer)
+    runner.run([infer_stage, Stage("render", render)], infer_stage)
+    runner.close()
+"""
+import os
+
+import cv2
+
+from capture import release_readers
+from sync import FrameSynchronizer
+from mosaic import Mosaic
+from pipeline import EndOfStream, Pipeline
+from metrics import JsonLinesExporter, MetricsRegistry, draw_overlay
+from sources import HeadlessSink
+
+# Sans écran (CI, serveur) : HEADLESS=1 compte les images au lieu de les afficher,
+# pendant DURATION secondes si la variable est définie
+HEADLESS = bool(os.environ.get("HEADLESS"))
+DURATION = float(os.environ.get("DURATION", 0)) or None
+
+
+class MultiCameraRunner:
+    """
+    Synchronized capture, mosaic display, metrics and export around the detection stages.
+
+    Args:
+    cameras (list): Started readers (CameraReader or SharedCameraReader).
+    show_overlay (bool): Draw the metrics on the mosaic.
+    metrics_file (str): JSON-lines file where the metrics are written every 10 s.
+    tile_size (tuple): (width, height) of a camera tile in the mosaic.
+    window_name (str): Name of the display window.
+    """
+
+    def __init__(self, cameras, show_overlay=True, metrics_file="metrics.jsonl", tile_size=(640, 480),
+                 window_name="Cameras"):
+        self.cameras = cameras
+        self.show_overlay = show_overlay
+        self.metrics_file = metrics_file
+        self.window_name = window_name
+        # Appairer les images par horodatage (40 ms max d'écart) pour ne pas compter deux fois un objet
+        self.sync = FrameSynchronizer(cameras, tolerance=0.040, policy="drop")
+        # Mosaïque allouée une seule fois pour l'affichage
+        self.mosaic = Mosaic(len(cameras), layout="1xN", tile_size=tile_size)
+        # Métriques par caméra : FPS capture et inférence, images perdues, file d'attente, latences
+        self.registry = MetricsRegistry()
+        self.infer_stage = None
+        self.camera_metrics = [self.registry.camera(reader.name, reader, self.infer_stage_depth)
+                               for reader in cameras]
+        self.registry.add_source("sync", self.sync.stats)
+        # Sans écran, la mosaïque est composée mais pas affichée
+        if HEADLESS:
+            self.sink = HeadlessSink(lambda packet: self.mosaic.compose(packet["frames"]), max_seconds=DURATION)
+        else:
+            self.sink = self.display
+        self.pipeline = None
+
+    def capture(self):
+        # Chaque image n'est traitée qu'une fois, et seulement si elle a une correspondante
+        frame_set = self.sync.next()
+        if frame_set is None:
+            # Fin d'une vidéo ou d'un dossier d'images : plus aucun ensemble complet possible
+            if any(reader.ended for reader in self.cameras):
+                raise EndOfStream
+            return None
+        return {"timestamp": min(frame_set.timestamps), "frames": frame_set.frames}
+
+    def infer_stage_depth(self):
+        return self.infer_stage.queue.qsize() if self.infer_stage is not None else 0
+
+    def display(self, packet):
+        # Placer les images dans la mosaïque pour l'affichage
+        image = self.mosaic.compose(packet["frames"])
+        if self.show_overlay:
+            draw_overlay(image, self.registry, self.mosaic)
+        cv2.imshow(self.window_name, image)
+        return cv2.waitKey(1) & 0xFF != ord('q')
+
+    def run(self, stages, infer_stage=None):
+        """
+        Runs the pipeline until the end of a source, "q" or DURATION, exporting the metrics.
+
+        Args:
+        stages (list): Stages between the capture and the display; packets hold "timestamp" and "frames".
+        infer_stage (Stage): The stage whose queue depth is reported as the camera queue depth.
+        """
+        self.infer_stage = infer_stage
+        # Capture, détection, rendu et affichage se chevauchent, chacun derrière une file bornée
+        self.pipeline = Pipeline(self.capture, stages, self.sink)
+        self.registry.add_source("pipeline", self.pipeline.stats)
+        exporter = JsonLinesExporter(self.registry, self.metrics_file, interval=10)
+        try:
+            self.pipeline.run()
+        finally:
+            exporter.close()
+
+    def close(self):
+        """
+        Prints the synchronizer and pipeline statistics, releases the cameras and closes the window.
+        """
+        print(self.sync.stats())
+        if self.pipeline is not None:
+            print(self.pipeline.stats())
+        release_readers(self.cameras)
+        if HEADLESS:
+            print(f"{self.sink.frames} images, {self.sink.fps:.1f} FPS")
+        else:
+            cv2.destroyAllWindows()
@@ -0,0 +1,252 @@
+"""
+Multiprocess camera capture with shared-memory frame rings.
+
+Capture and decoding compete for the GIL with inference and display when they
+run in the same process. Here each camera (or group of cameras) runs in its own
+worker process, which decodes straight into a multiprocessing.shared_memory ring
+buffer with cap.retrieve(image=slot). The main process reads the newest slot as a
+zero-copy NumPy view through SharedCameraReader, which has the same interface as
+CameraReader, so FrameSynchronizer, Pipeline and the metrics work unchanged.
+
+A slot is rewritten only after `slots` newer frames, which gives the consumer that
+many frame periods to finish with a view (use still_valid() to check, or copy the
+frame if it must live longer). The workers are started with the "spawn" method, so
+they never inherit torch or CUDA state from the parent whatever its imports; the
+calling script needs an `if __name__ == "__main__":` guard, and should import heavy
+modules inside it so the workers do not import them again.
+
+Usage:
+    cameras = SharedCameras([0, 1, 2, 3], shape=(480, 640))
+    ret, frame, timestamp = cameras.readers[0].read_timestamped(fresh=True)
+    cameras.release()
+"""
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from sources import open_source
+
+# En-tête : dernier numéro écrit, fin de flux, puis le numéro de l'image de chaque case
+_LATEST, _ENDED, _SLOTS = 0, 1, 2
+
+
+class SharedFrameRing:
+    """
+    Ring of fixed-size BGR frames in one shared memory block.
+
+    Args:
+    shape (tuple): (height, width) of the frames.
+    slots (int): Number of frames in the ring.
+    name (str): Name of an existing block to attach to, or None to create a new one.
+    """
+
+    def __init__(self, shape, slots=8, name=None):
+        height, width = shape[:2]
+        self.shape = (height, width, 3)
+        self.slots = slots
+        header_bytes = 8 * (_SLOTS + slots)
+        frame_bytes = height * width * 3
+        create = name is None
+        size = header_bytes + 8 * slots + slots * frame_bytes
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.header = np.ndarray((_SLOTS + slots,), np.int64, self.shm.buf, 0)
+        self.timestamps = np.ndarray((slots,), np.float64, self.shm.buf, header_bytes)
+        self.frames = np.ndarray((slots,) + self.shape, np.uint8, self.shm.buf, header_bytes + 8 * slots)
+        if create:
+            self.header[:] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def latest_seq(self):
+        return int(self.header[_LATEST])
+
+    @property
+    def ended(self):
+        return bool(self.header[_ENDED])
+
+    def begin_write(self):
+        """
+        Reserves the next slot. Returns its sequence number, index and a view to decode into.
+        """
+        seq = self.latest_seq + 1
+        slot = (seq - 1) % self.slots
+        # -1 : case en cours d'écriture, les lecteurs l'ignorent
+        self.header[_SLOTS + slot] = -1
+        return seq, slot, self.frames[slot]
+
+    def commit(self, seq, slot, timestamp):
+        self.timestamps[slot] = timestamp
+        self.header[_SLOTS + slot] = seq
+        self.header[_LATEST] = seq
+
+    def mark_ended(self):
+        self.header[_ENDED] = 1
+
+    def latest(self):
+        """
+        Returns (seq, timestamp, frame view) of the newest complete frame, or None.
+        """
+        seq = self.latest_seq
+        if seq == 0:
+            return None
+        slot = (seq - 1) % self.slots
+        timestamp = float(self.timestamps[slot])
+        if self.header[_SLOTS + slot] != seq:
+            return None
+        return seq, timestamp, self.frames[slot]
+
+    def still_valid(self, seq):
+        """
+        Returns True while the frame with this sequence number has not been overwritten.
+        """
+        return self.header[_SLOTS + (seq - 1) % self.slots] == seq
+
+    def close(self):
+        # Les vues NumPy doivent disparaître avant de fermer le bloc
+        del self.header, self.timestamps, self.frames
+        try:
+            self.shm.close()
+        except BufferError:
+            # Une image est encore référencée ailleurs : le bloc sera libéré avec elle
+            pass
+
+
+def camera_worker(sources, ring_names, shape, slots, stop, source_args):
+    """
+    Worker process: captures a group of cameras into their shared rings.
+
+    The frames of the group are grabbed first and decoded afterwards, so the cameras
+    of a group are sampled as close together as possible.
+    """
+    rings = [SharedFrameRing(shape, slots, name) for name in ring_names]
+    height, width = shape[:2]
+    # La taille du ring est négociée avec la caméra : pas de redimensionnement si elle l'accepte
+    caps = [open_source(source, width=width, height=height, **source_args) for source in sources]
+    active = [cap.isOpened() for cap in caps]
+    for ring, is_active in zip(rings, active):
+        if not is_active:
+            ring.mark_ended()
+    while not stop.is_set() and any(active):
+        grabbed = [active[index] and cap.grab() for index, cap in enumerate(caps)]
+        timestamp = time.monotonic()
+        for index, (cap, ring) in enumerate(zip(caps, rings)):
+            if not grabbed[index]:
+                if active[index]:
+                    active[index] = False
+                    ring.mark_ended()
+                continue
+            seq, slot, view = ring.begin_write()
+            ret, frame = cap.retrieve(view)
+            if not ret:
+                continue
+            if frame.shape != view.shape:
+                # Résolution refusée par la caméra (ou vidéo d'une autre taille) : redimensionner dans le ring
+                cv2.resize(frame, (width, height), dst=view)
+            elif frame.ctypes.data != view.ctypes.data:
+                # Image décodée ailleurs (source sans décodage en place) : la copier dans le ring
+                np.copyto(view, frame)
+            ring.commit(seq, slot, timestamp)
+    for cap in caps:
+        cap.release()
+    for ring in rings:
+        ring.close()
+
+
+class SharedCameraReader:
+    """
+    Reads the newest frame of a shared ring; same interface as CameraReader.
+
+    Args:
+    ring (SharedFrameRing): The ring filled by a worker process.
+    name (str): Name of the camera.
+    copy (bool): Return copies instead of zero-copy views of the shared memory.
+    """
+
+    def __init__(self, ring, name, copy=False):
+        self.ring = ring
+        self.name = name
+        self.copy = copy
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self._returned_seq = 0
+
+    @property
+    def ended(self):
+        return self.ring.ended
+
+    def isOpened(self):
+        return not self.ring.ended
+
+    def read(self, fresh=False):
+        ret, frame, _ = self.read_timestamped(fresh)
+        return ret, frame
+
+    def read_timestamped(self, fresh=False):
+        latest = self.ring.latest()
+        if latest is None:
+            return False, None, None
+        seq, timestamp, frame = latest
+        self.frames_read = seq
+        if fresh and seq == self._returned_seq:
+            return False, None, None
+        if self._returned_seq:
+            self.frames_dropped += max(seq - self._returned_seq - 1, 0)
+        self._returned_seq = seq
+        return True, frame.copy() if self.copy else frame, timestamp
+
+    def still_valid(self):
+        """
+        Returns True while the last frame returned by read() has not been overwritten.
+        """
+        return self.ring.still_valid(self._returned_seq)
+
+    def release(self):
+        pass
+
+
+class SharedCameras:
+    """
+    Starts the camera worker processes and exposes one SharedCameraReader per camera.
+
+    Args:
+    sources (list): Source descriptions, see open_source().
+    shape (tuple): (height, width) of the shared frames, negotiated with the cameras (resized if refused).
+    slots (int): Frames per ring.
+    groups (list): Lists of indices into sources, one list per worker process. None: one process per camera.
+    copy (bool): Make the readers return copies instead of zero-copy views.
+    source_args: Frame rate and pixel format negotiated at open time, e.g. fps=30, fourcc="MJPG".
+    """
+
+    def __init__(self, sources, shape=(480, 640), slots=8, groups=None, copy=False, **source_args):
+        self.rings = [SharedFrameRing(shape, slots) for _ in sources]
+        self.readers = [SharedCameraReader(ring, f"cam{source}", copy) for ring, source in zip(self.rings, sources)]
+        # "spawn" : un processus neuf, sans copie de l'état (torch, threads) du parent
+        context = multiprocessing.get_context("spawn")
+        self._stop = context.Event()
+        self.processes = []
+        for group in groups or [[index] for index in range(len(sources))]:
+            process = context.Process(
+                target=camera_worker, daemon=True,
+                args=([sources[index] for index in group], [self.rings[index].name for index in group],
+                      shape, slots, self._stop, source_args))
+            process.start()
+            self.processes.append(process)
+
+    def release(self):
+        """
+        Stops the workers and frees the shared memory.
+        """
+        self._stop.set()
+        for process in self.processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        for ring in self.rings:
+            ring.close()
+            ring.shm.unlink()
@@ -0,0 +1,363 @@
+"""
+Pluggable frame sources and a headless sink.
+
+Every capture script used to hardcode cv2.VideoCapture(0) and cv2.imshow, so none
+of them could run on a headless CI box. open_source() turns a source description
+into an object with the cv2.VideoCapture interface (read, isOpened, get, set,
+release):
+
+    0, 4, ...                     A camera device (cv2.VideoCapture).
+    "video.mp4", "rtsp://..."     A video file or stream (VideoFileSource, optionally paced and looped).
+    "images/"                     A directory of images, played in name order (ImageDirectorySource).
+    "synthetic:1280x720@30"       A deterministic generator of moving boxes (SyntheticSource).
+
+open_source() can also negotiate the resolution, frame rate and pixel format
+(e.g. MJPG) with the device through CAP_PROP_* at open time; frames are resized
+(ResizedCapture) only when the device or file does not deliver the requested size.
+
+HeadlessSink replaces the display of a Pipeline: it counts (and optionally
+processes) the frames instead of showing them, and stops after a number of frames
+or seconds.
+
+Usage:
+    cameras = open_readers(["synthetic:640x480@30", "videos/entrance.mp4"])
+    pipeline = Pipeline(capture, stages, HeadlessSink(max_seconds=60))
+"""
+import os
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class _PacedSource:
+    """
+    Base class of the file and synthetic sources: paces read() to the source frame rate.
+    """
+
+    def __init__(self, fps, realtime):
+        self.fps = fps
+        self.realtime = realtime
+        self.index = 0
+        self._start = None
+        self._grabbed = (False, None)
+
+    def _wait(self):
+        if not self.realtime or not self.fps:
+            return
+        if self._start is None:
+            self._start = time.monotonic()
+        delay = self._start + self.index / self.fps - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps or 0)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.index)
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def grab(self):
+        self._grabbed = self.read()
+        return self._grabbed[0]
+
+    def retrieve(self, image=None):
+        ret, frame = self._grabbed
+        if ret and image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return ret, image
+        return ret, frame
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+class SyntheticSource(_PacedSource):
+    """
+    Deterministic generator of frames with moving boxes, for benchmarks and tests.
+
+    Args:
+    width (int), height (int): Frame size.
+    fps (float): Frame rate.
+    objects (int): Number of moving boxes.
+    seed (int): Seed of the box sizes, positions and speeds; the same seed gives the same frames.
+    realtime (bool): Pace read() to fps. False returns frames as fast as possible.
+    max_frames (int): Number of frames before read() returns False (None: endless).
+    """
+
+    def __init__(self, width=640, height=480, fps=30, objects=5, seed=0, realtime=True, max_frames=None):
+        super().__init__(fps, realtime)
+        self.width = width
+        self.height = height
+        self.max_frames = max_frames
+        rng = np.random.default_rng(seed)
+        self._sizes = rng.integers(min(width, height) // 12, min(width, height) // 4, size=(objects, 2))
+        self._starts = rng.uniform(0, 1, size=(objects, 2)) * [width, height]
+        self._speeds = rng.uniform(-6, 6, size=(objects, 2))
+        self._colors = rng.integers(0, 256, size=(objects, 3)).tolist()
+        # Fond en dégradé calculé une seule fois
+        gradient = np.linspace(40, 200, width, dtype=np.uint8)
+        self._background = np.repeat(np.tile(gradient, (height, 1))[:, :, None], 3, axis=2)
+
+    def read(self, image=None):
+        if self.max_frames is not None and self.index >= self.max_frames:
+            return False, None
+        self._wait()
+        if image is None or image.shape != self._background.shape:
+            frame = self._background.copy()
+        else:
+            frame = image
+            np.copyto(frame, self._background)
+        span = np.array([self.width, self.height]) - self._sizes
+        # Rebond sur les bords : position triangulaire en fonction du numéro d'image
+        position = np.abs((self._starts + self._speeds * self.index) % (2 * span) - span)
+        position = span - position
+        for (x, y), (w, h), color in zip(position.astype(int).tolist(), self._sizes.tolist(), self._colors):
+            cv2.rectangle(frame, (x, y), (x + w, y + h), color, -1)
+        cv2.putText(frame, str(self.index), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        self.index += 1
+        return True, frame
+
+
+class VideoFileSource(_PacedSource):
+    """
+    Video file played like a camera.
+
+    Args:
+    path (str): Video file or stream URL.
+    realtime (bool): Pace read() to the file frame rate instead of decoding as fast as possible.
+    loop (bool): Start again at the end of the file.
+    """
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS) or 30.0, realtime)
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.loop = loop
+
+    def read(self, image=None):
+        self._wait()
+        ret, frame = self.cap.read(image)
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(image)
+        self.index += 1
+        return ret, frame
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectorySource(_PacedSource):
+    """
+    Directory of images played in name order like a camera.
+
+    Args:
+    path (str): Directory containing the images.
+    fps (float): Frame rate.
+    realtime (bool): Pace read() to fps.
+    loop (bool): Start again after the last image.
+    """
+
+    def __init__(self, path, fps=30, realtime=True, loop=False):
+        super().__init__(fps, realtime)
+        self.files = sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        self.loop = loop
+        first = cv2.imread(self.files[0]) if self.files else None
+        self.height, self.width = first.shape[:2] if first is not None else (0, 0)
+
+    def read(self, image=None):
+        if self.index >= len(self.files):
+            if not self.loop or not self.files:
+                return False, None
+        self._wait()
+        frame = cv2.imread(self.files[self.index % len(self.files)])
+        self.index += 1
+        return frame is not None, frame
+
+    def isOpened(self):
+        return bool(self.files)
+
+
+class ResizedCapture:
+    """
+    Wraps a capture whose frames do not have the requested size and resizes them.
+
+    Only used as a fallback when the device refuses the negotiated resolution.
+
+    Args:
+    cap: Capture with the cv2.VideoCapture interface.
+    width (int), height (int): Size of the returned frames.
+    """
+
+    def __init__(self, cap, width, height):
+        self.cap = cap
+        self.width = width
+        self.height = height
+
+    def _resize(self, ret, frame, image):
+        if not ret or frame.shape[:2] == (self.height, self.width):
+            return ret, frame
+        if image is not None and image.shape[:2] == (self.height, self.width):
+            return ret, cv2.resize(frame, (self.width, self.height), dst=image, interpolation=cv2.INTER_AREA)
+        return ret, cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+
+    def read(self, image=None):
+        return self._resize(*self.cap.read(), image)
+
+    def grab(self):
+        return self.cap.grab()
+
+    def retrieve(self, image=None):
+        return self._resize(*self.cap.retrieve(), image)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+def negotiate(cap, width=None, height=None, fps=None, fourcc=None):
+    """
+    Asks a capture device for a pixel format, resolution and frame rate.
+
+    The pixel format is set first: with V4L2, large resolutions at full frame rate are
+    often only offered in MJPG.
+
+    Returns:
+    dict: The width, height, fps and fourcc the device actually accepted.
+    """
+    if fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    if width:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    if height:
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if fps:
+        cap.set(cv2.CAP_PROP_FPS, fps)
+    code = int(cap.get(cv2.CAP_PROP_FOURCC))
+    return {
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": cap.get(cv2.CAP_PROP_FPS),
+        "fourcc": "".join(chr((code >> 8 * index) & 0xFF) for index in range(4)) if code > 0 else "",
+    }
+
+
+def open_source(source, realtime=True, loop=False, width=None, height=None, fps=None, fourcc=None):
+    """
+    Opens a frame source from its description (see the module docstring).
+
+    Args:
+    source (int | str): Camera index, video path or URL, image directory, or "synthetic:WxH@FPS".
+    realtime (bool): Pace file and synthetic sources to their frame rate.
+    loop (bool): Loop video files and image directories.
+    width (int), height (int): Requested frame size. Negotiated with devices, resized otherwise.
+    fps (float): Requested frame rate (devices only).
+    fourcc (str): Requested pixel format, e.g. "MJPG" (devices only).
+
+    Returns:
+    An object with the cv2.VideoCapture interface.
+    """
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        cap = cv2.VideoCapture(int(source))
+        if cap.isOpened() and (width or height or fps or fourcc):
+            accepted = negotiate(cap, width, height, fps, fourcc)
+            if (width and accepted["width"] != width) or (height and accepted["height"] != height):
+                print(f"Caméra {source} : {accepted['width']}x{accepted['height']} au lieu de "
+                      f"{width}x{height}, les images seront redimensionnées")
+    elif source.startswith("synthetic"):
+        synthetic_width, synthetic_height, synthetic_fps = 640, 480, 30
+        if ":" in source:
+            size, _, rate = source.split(":", 1)[1].partition("@")
+            synthetic_width, synthetic_height = (int(value) for value in size.lower().split("x"))
+            synthetic_fps = float(rate) if rate else synthetic_fps
+        # Une source synthétique produit directement la taille demandée
+        cap = SyntheticSource(width or synthetic_width, height or synthetic_height, synthetic_fps, realtime=realtime)
+    elif os.path.isdir(source):
+        cap = ImageDirectorySource(source, realtime=realtime, loop=loop)
+    else:
+        cap = VideoFileSource(source, realtime=realtime, loop=loop)
+    if width and height and (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))) != (width, height):
+        # Repli : la source refuse la taille demandée
+        cap = ResizedCapture(cap, width, height)
+    return cap
+
+
+def sources_from_env(default, variable="CAMERAS"):
+    """
+    Returns the sources listed (comma separated) in an environment variable, or the default list.
+
+    Example: CAMERAS="synthetic:1280x720@30,synthetic:640x480@15" python cams1.py
+    """
+    value = os.environ.get(variable)
+    if not value:
+        return default
+    return [int(item) if item.strip().isdigit() else item.strip() for item in value.split(",")]
+
+
+class HeadlessSink:
+    """
+    Pipeline sink which counts frames instead of displaying them.
+
+    Args:
+    func (callable): Optional work done on each packet before it is discarded (e.g. composing the mosaic).
+    max_frames (int): Stop the pipeline after this many frames (None: never).
+    max_seconds (float): Stop the pipeline after this many seconds (None: never).
+    """
+
+    def __init__(self, func=None, max_frames=None, max_seconds=None):
+        self.func = func
+        self.max_frames = max_frames
+        self.max_seconds = max_seconds
+        self.frames = 0
+        self._start = None
+
+    def __call__(self, packet):
+        if self._start is None:
+            self._start = time.monotonic()
+        if self.func is not None:
+            self.func(packet)
+        self.frames += 1
+        if self.max_frames is not None and self.frames >= self.max_frames:
+            return False
+        if self.max_seconds is not None and self.elapsed >= self.max_seconds:
+            return False
+        return True
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self._start if self._start is not None else 0.0
+
+    @property
+    def fps(self):
+        return self.frames / self.elapsed if self.elapsed else 0.0
@@ -0,0 +1,64 @@
+"""
+Warm standby camera switching.
+
+When only the active camera is read, the driver buffers of the other cameras fill
+up with stale frames, and the first frames shown after a switch are seconds old.
+CameraSwitcher keeps one CameraReader per camera: inactive cameras only grab()
+(the driver buffer stays drained, nothing is decoded), and only the active camera
+is decoded with retrieve(). A switch is therefore instant and its first frame is
+fresh, for little CPU even with many cameras attached.
+
+Usage:
+    switcher = CameraSwitcher([0, 1, 2, 3])
+    switcher.switch(2)
+    ret, frame = switcher.read()
+"""
+from capture import CameraReader
+
+
+class CameraSwitcher:
+    """
+    Shows one camera out of several, keeping the others in warm standby.
+
+    Args:
+    sources (list): Source descriptions, see open_source().
+    active (int): Index of the camera shown first.
+    source_args: Resolution, frame rate and pixel format negotiated at open time, see open_source().
+    """
+
+    def __init__(self, sources, active=0, **source_args):
+        self.readers = []
+        for index, source in enumerate(sources):
+            reader = CameraReader(source, decode=index == active, **source_args)
+            if not reader.isOpened():
+                print(f'Erreur... {reader.name}')
+            self.readers.append(reader.start())
+        self.active = active
+        self._last = None
+
+    def switch(self, index):
+        """
+        Makes camera `index` the active (decoded) camera.
+        """
+        if index == self.active or not 0 <= index < len(self.readers):
+            return
+        self.readers[self.active].decode = False
+        reader = self.readers[index]
+        # Oublier les images décodées lors de la dernière activation de cette caméra
+        reader.clear()
+        reader.decode = True
+        self.active = index
+
+    def read(self):
+        """
+        Returns the newest frame of the active camera. Until its first frame after a switch
+        arrives, the last frame shown is returned again.
+        """
+        ret, frame = self.readers[self.active].read()
+        if ret:
+            self._last = frame
+        return self._last is not None, self._last
+
+    def release(self):
+        for reader in self.readers:
+            reader.release()
@@ -0,0 +1,136 @@
+"""
+Timestamp-based frame synchronization across cameras.
+
+Cameras rarely run at the same rate: pairing whatever read() returns drifts by
+hundreds of milliseconds between a 15 fps and a 30 fps sensor, and objects get
+counted twice by multi-view counting. FrameSynchronizer pairs frames by their
+capture timestamps (see CameraReader.read_timestamped) and only emits a frame
+set whose timestamps lie within a skew tolerance.
+
+Policies:
+    "drop"   Emit only matched sets; frames that cannot be matched are discarded.
+    "repeat" Emit as soon as one camera has a new frame; the others repeat their last frame.
+    "wait"   Like "drop", but next() blocks up to timeout seconds for a matching set.
+
+Usage:
+    sync = FrameSynchronizer(readers, tolerance=0.040, policy="drop")
+    while True:
+        frame_set = sync.next()
+        if frame_set is not None:
+            frames = frame_set.frames
+"""
+import time
+from collections import deque, namedtuple
+
+POLICIES = ("drop", "repeat", "wait")
+
+FrameSet = namedtuple("FrameSet", ["frames", "timestamps", "skew"])
+
+
+class FrameSynchronizer:
+    """
+    Emits sets of frames, one per camera, captured within a skew tolerance.
+
+    Args:
+    readers (list): Objects with a read_timestamped(fresh=True) method, e.g. CameraReader.
+    tolerance (float): Maximum allowed skew between the frames of a set, in seconds.
+    policy (str): One of "drop", "repeat" or "wait".
+    timeout (float): Maximum time next() blocks with the "wait" policy, in seconds.
+    max_pending (int): Number of frames kept per camera while waiting for a match.
+    """
+
+    def __init__(self, readers, tolerance=0.040, policy="drop", timeout=0.1, max_pending=4):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}")
+        self.readers = readers
+        self.tolerance = tolerance
+        self.policy = policy
+        self.timeout = timeout
+        self._pending = [deque(maxlen=max_pending) for _ in readers]
+        self._last = [None] * len(readers)
+        self.sets_emitted = 0
+        self.frames_dropped = 0
+        self.frames_repeated = 0
+        self.last_skew = 0.0
+        self.max_skew = 0.0
+        self._skew_total = 0.0
+
+    @property
+    def mean_skew(self):
+        return self._skew_total / self.sets_emitted if self.sets_emitted else 0.0
+
+    def stats(self):
+        """
+        Returns the synchronization counters as a dictionary (skews in milliseconds).
+        """
+        return {
+            "sets_emitted": self.sets_emitted,
+            "frames_dropped": self.frames_dropped,
+            "frames_repeated": self.frames_repeated,
+            "last_skew_ms": self.last_skew * 1000,
+            "mean_skew_ms": self.mean_skew * 1000,
+            "max_skew_ms": self.max_skew * 1000,
+        }
+
+    def _pull(self):
+        for reader, pending in zip(self.readers, self._pending):
+            ret, frame, timestamp = reader.read_timestamped(fresh=True)
+            if ret:
+                if len(pending) == pending.maxlen:
+                    self.frames_dropped += 1
+                pending.append((timestamp, frame))
+
+    def _match(self):
+        # Jeter la plus ancienne image tant que l'écart dépasse la tolérance
+        while all(self._pending):
+            heads = [pending[0][0] for pending in self._pending]
+            oldest = min(heads)
+            if max(heads) - oldest <= self.tolerance:
+                return [pending.popleft() for pending in self._pending]
+            self._pending[heads.index(oldest)].popleft()
+            self.frames_dropped += 1
+        return None
+
+    def _repeat(self):
+        if not any(self._pending):
+            return None
+        entries = []
+        for index, pending in enumerate(self._pending):
+            if pending:
+                # Seule la plus récente image est utilisée, les autres sont perdues
+                self.frames_dropped += len(pending) - 1
+                entries.append(pending[-1])
+                pending.clear()
+            elif self._last[index] is not None:
+                self.frames_repeated += 1
+                entries.append(self._last[index])
+            else:
+                return None
+        return entries
+
+    def _emit(self, entries):
+        self._last = entries
+        timestamps = [timestamp for timestamp, _ in entries]
+        skew = max(timestamps) - min(timestamps)
+        self.sets_emitted += 1
+        self.last_skew = skew
+        self.max_skew = max(self.max_skew, skew)
+        self._skew_total += skew
+        return FrameSet([frame for _, frame in entries], timestamps, skew)
+
+    def next(self):
+        """
+        Returns the next synchronized FrameSet, or None if no set can be emitted yet.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            self._pull()
+            if self.policy == "repeat":
+                entries = self._match() or self._repeat()
+            else:
+                entries = self._match()
+            if entries is not None:
+                return self._emit(entries)
+            if self.policy != "wait" or time.monotonic() >= deadline:
+                return None
+            time.sleep(0.001)
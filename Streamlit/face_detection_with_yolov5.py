@@ -1,28 +1,23 @@
+import os
+import sys
+
 import streamlit as st
-import torch
-import torchvision
-from torchvision import*
-from PIL import Image
-import cv2
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'Yolov5'))
+from model_registry import get_model
+from batching import chunked, decode_uploads
+from counting import ClassCounter, count_matrix, counts_to_dict
+
 @st.cache_resource
 def load_model():
-    model = torch.hub.load('ultralytics/yolov5', 'yolov5l', pretrained=True)
+    # Registre local : pas d'accès réseau si le modèle est en cache
+    model = get_model('yolov5l')
     return model
 
-def run_detection(model, img):
-    results = model(img)
-    return results
-
-def count_classes(results, class_names):
-    class_counts = {}
-    for det in results.xyxy[0]:
-        class_id = int(det[5])
-        class_name = class_names[class_id]
-        if class_name in class_counts:
-            class_counts[class_name] += 1
-        else:
-            class_counts[class_name] = 1
-    return class_counts
+def run_detection(model, imgs):
+    # Toutes les images du lot en une seule passe ; un résultat par image
+    results = model(imgs)
+    return results.tolist()
 
 def main():
     st.title("Détection des objets avec YOLOv5 et Streamlit")
@@ -30,23 +25,42 @@ def main():
 
     files = st.file_uploader("Téléchargez une ou plusieurs images", type=["jpg", "jpeg", "png"], accept_multiple_files=True)
 
-    if files:
+    # Nombre d'images détectées ensemble en une seule passe
+    batch_size = st.slider("Images par lot", 1, 64, 16)
+
+    if files and st.button(f"Détection pour les {len(files)} images"):
         class_names = model.module.names if hasattr(model, 'module') else model.names  # Get class names
+        progress = st.progress(0.0)
+        done = 0
+        # Comptage sur l'ensemble des images téléchargées
+        counter = ClassCounter(len(class_names))
 
-        for file in files:
-            image = Image.open(file)
-            st.image(image, caption=f"Image originale: {file.name}", use_column_width=True)
+        # Décodage en parallèle, détection lot par lot : chaque lot s'affiche dès qu'il est prêt
+        for chunk in chunked(decode_uploads(files), batch_size):
+            for name, image, _ in chunk:
+                if image is None:
+                    st.error(f"Image illisible: {name}")
+            valid = [item for item in chunk if item[1] is not None]
+            if valid:
+                batch_results = run_detection(model, [image for _, image, _ in valid])
+                # Comptes image x classe de tout le lot en une fois
+                counts = counter.update(count_matrix([results.xyxy[0] for results in batch_results], len(class_names)))
+                for (name, image, _), results, image_counts in zip(valid, batch_results, counts):
+                    st.image(image, caption=f"Image originale: {name}", use_column_width=True)
+                    image_with_boxes = results.render()[0]
+                    st.image(image_with_boxes, caption=f"Image avec détections: {name}", use_column_width=True)
 
-            if st.button(f"Détection pour {file.name}"):
-                results = run_detection(model, image)
-                image_with_boxes = results.render()
-                st.image(image_with_boxes, caption=f"Image avec détections: {file.name}", use_column_width=True)
+                    # Compter le nombre d'objets détectés par classe
+                    class_counts = counts_to_dict(image_counts, class_names)
+                    st.write("Nombre d'objets détectés par classe:")
+                    for class_name, count in class_counts.items():
+                        st.write(f"{class_name}: {count}")
+            done += len(chunk)
+            progress.progress(done / len(files))
 
-                # Compter le nombre d'objets détectés par classe
-                class_counts = count_classes(results, class_names)
-                st.write("Nombre d'objets détectés par classe:")
-                for class_name, count in class_counts.items():
-                    st.write(f"{class_name}: {count}")
+        st.write(f"Nombre total d'objets détectés par classe ({counter.images} images):")
+        for class_name, count in counts_to_dict(counter.totals, class_names).items():
+            st.write(f"{class_name}: {count}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
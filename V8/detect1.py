@@ -1,35 +1,75 @@
+import os
+import sys
+
 import cv2
 from ultralytics import YOLO
 
+# Rendu des boîtes partagé (Yolov5/rendering.py, utilisé par scheduler.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'Yolov5'))
+from scheduler import DetectionScheduler, draw_detections
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'Cameras'))
+from capture import CameraReader
+from pipeline import EndOfStream, Pipeline, Stage
+from motion import MotionGate
+
 # Load the YOLOv8 model
 model = YOLO('yolov8n.pt')
 
+# Run the detector every k frames only and track the boxes with optical flow in between;
+# k adapts itself to reach the target frame rate
+scheduler = DetectionScheduler(model, k=5, target_fps=25)
+
+# Skip both detection and tracking while the scene does not move, and reuse the last boxes
+gate = MotionGate(ratio_threshold=0.01)
+last_detections = None
+
 # Open the video file
 video_path = "path/to/your/video/file.mp4"
-cap = cv2.VideoCapture(0)
+cap = CameraReader(0).start()
+
+
+def capture():
+    # Read a new frame from the video, without waiting for it
+    success, frame, timestamp = cap.read_timestamped(fresh=True)
+    if not success:
+        if cap.ended:
+            # The end of the video is reached
+            raise EndOfStream
+        return None
+    return {"timestamp": timestamp, "frame": frame}
+
+
+def infer(packet):
+    # Run YOLOv8 inference on the frame, or propagate the last boxes when something moved
+    global last_detections
+    if gate.check(packet["frame"]) or last_detections is None:
+        last_detections = scheduler.step(packet["frame"])
+    packet["detections"] = last_detections
+    return packet
+
+
+def render(packet):
+    # Visualize the results on the frame
+    boxes, confidences, classes, _ = packet["detections"]
+    packet["frame"] = draw_detections(packet["frame"], boxes, confidences, classes, model.names)
+    return packet
 
-# Loop through the video frames
-while cap.isOpened():
-    # Read a frame from the video
-    success, frame = cap.read()
 
-    if success:
-        # Run YOLOv8 inference on the frame
-        results = model(frame)
+def display(packet):
+    # Display the annotated frame, stop if 'q' is pressed
+    cv2.imshow("YOLOv8 Inference", packet["frame"])
+    return cv2.waitKey(1) & 0xFF != ord("q")
 
-        # Visualize the results on the frame
-        annotated_frame = results[0].plot()
 
-        # Display the annotated frame
-        cv2.imshow("YOLOv8 Inference", annotated_frame)
+# Capture, inference, rendering and display overlap, each behind a bounded queue
+pipeline = Pipeline(capture, [Stage("infer", infer), Stage("render", render)], display)
+pipeline.run()
 
-        # Break the loop if 'q' is pressed
-        if cv2.waitKey(1) & 0xFF == ord("q"):
-            break
-    else:
-        # Break the loop if the end of the video is reached
-        break
+print(scheduler.stats())
+print(gate.stats())
+print(pipeline.stats())
 
 # Release the video capture object and close the display window
 cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+cv2.destroyAllWindows()
@@ -1,39 +1,78 @@
-import cv2
+import os
+import sys
+import time
+
 from ultralytics import YOLO
 
+from multisource import MultiSourceDetector
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'Cameras'))
+# Rendu des boîtes partagé (Yolov5/rendering.py, utilisé par roi.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'Yolov5'))
+from capture import open_readers
+from roi import RegionsOfInterest
+from pipeline import Stage
+from runner import MultiCameraRunner
+from sources import sources_from_env
+
+# Caméras à utiliser : index OpenCV, vidéos, dossiers d'images ou "synthetic:WxH@FPS"
+# (modifiable par la variable d'environnement CAMERAS, ex. CAMERAS=synthetic:1280x720@30,video.mp4).
+# Sans écran : HEADLESS=1 (et DURATION=secondes), voir Cameras/runner.py
+CAMERAS = sources_from_env([0, 2])
+
+# Dessin des détections par caméra
+RENDER = [True] * len(CAMERAS)
+
+# Zones d'intérêt par caméra, (x, y, largeur, hauteur) en pixels ou en fractions de l'image ;
+# None : image entière. Seules ces zones sont envoyées au modèle, à leur résolution d'origine
+ROIS = [None, None]
+
+# Afficher les métriques sur la mosaïque, et fichier où elles sont enregistrées toutes les 10 s
+SHOW_OVERLAY = True
+METRICS_FILE = "metrics.jsonl"
+
 # Load the YOLOv8 model
 model = YOLO('yolov8n.pt')
 
+# Les zones d'intérêt de toutes les caméras passent dans un seul predict batché, en mode stream ;
+# le dessin est fait par l'étape de rendu du pipeline
+detector = MultiSourceDetector(model, render=False)
+
+# Un thread de lecture par caméra, seule la dernière image est conservée
+cameras = open_readers(CAMERAS)
 
-camera1 = cv2.VideoCapture(0)
-camera2 = cv2.VideoCapture(2)
+# Découpe des zones d'intérêt et remise des boîtes en coordonnées de l'image entière
+regions = RegionsOfInterest(ROIS, len(cameras))
 
-if not camera1.isOpened():
-    print('Erreur ...cam1')
+# Capture synchronisée, mosaïque, métriques et export communs aux scripts multi-caméras
+runner = MultiCameraRunner(cameras, SHOW_OVERLAY, METRICS_FILE)
+camera_metrics = runner.camera_metrics
+# Temps par étape (ms par lot) pour dimensionner le matériel
+runner.registry.add_source("yolo", detector.timings)
 
-if not camera2.isOpened():
-    print('Erreur.. cam2')
 
-while True:
-    ret1, frame1 = camera1.read()
-    ret2, frame2 = camera2.read()
+def infer(packet):
+    # Appliquer YOLOv8 aux zones d'intérêt de toutes les caméras en un seul lot
+    start = time.perf_counter()
+    crops, origins = regions.crop(packet["frames"])
+    boxes = [result.boxes.data.cpu().numpy()
+             for _, result, _ in detector(crops, imgsz=regions.inference_size(crops))]
+    packet["detections"] = regions.merge(boxes, origins)
+    for metrics in camera_metrics:
+        metrics.record_inference(time.perf_counter() - start)
+    return packet
 
-    if ret1 and ret2:
-        # Appliquer YOLOv5 aux deux images
-        results1 = model(frame1)
-        results2 = model(frame2)
 
-        # Récupérer les images avec les détections
-        frame1 = results1[0].plot()
-        frame2 = results2[0].plot()
+def render(packet):
+    # Image annotée, ou image brute si le rendu est désactivé pour cette caméra
+    packet["frames"] = [regions.annotate(frame.copy(), index, detections, model.names) if enabled else frame
+                        for index, (frame, detections, enabled)
+                        in enumerate(zip(packet["frames"], packet["detections"], RENDER))]
+    return packet
 
-        # Concaténer les images pour l'affichage
-        frame = cv2.hconcat([frame1, frame2])
-        cv2.imshow("Cameras", frame)
 
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+infer_stage = Stage("infer", infer)
+runner.run([infer_stage, Stage("render", render)], infer_stage)
 
-camera1.release()
-camera2.release()
-cv2.destroyAllWindows()
+print(detector.timings())
+runner.close()
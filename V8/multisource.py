@@ -0,0 +1,70 @@
+"""
+Batched, streaming YOLOv8 inference over several cameras.
+
+All camera frames go through a single model.predict() call (one batch) with
+stream=True, so results are yielded one camera at a time instead of being
+accumulated in a list. Rendering with Results.plot() is optional per camera,
+and the preprocess / inference / postprocess timings reported by ultralytics
+are collected for every batch to size hardware per number of streams.
+
+Usage:
+    detector = MultiSourceDetector(YOLO('yolov8n.pt'), render=[True, False])
+    for index, result, annotated in detector(frames):
+        ...
+    print(detector.timings())
+"""
+STAGES = ("preprocess", "inference", "postprocess")
+
+
+class MultiSourceDetector:
+    """
+    Runs one YOLOv8 batch per set of camera frames.
+
+    Args:
+    model (ultralytics.YOLO): The loaded model.
+    render (list | bool): One boolean per camera, True to draw the detections. None or True renders every
+    camera, False none of them.
+    predict_args: Extra arguments for model.predict() (conf, iou, imgsz, device...).
+    """
+
+    def __init__(self, model, render=None, **predict_args):
+        self.model = model
+        self.render = render
+        self.predict_args = dict(verbose=False, **predict_args)
+        self.batches = 0
+        self.last_batch = {stage: 0.0 for stage in STAGES}
+        self._totals = {stage: 0.0 for stage in STAGES}
+
+    def __call__(self, frames, **predict_args):
+        """
+        Detects objects on one frame per camera.
+
+        Args:
+        frames (list): BGR frames, one per camera.
+        predict_args: Arguments overriding those of the constructor for this batch (e.g. imgsz).
+
+        Yields:
+        (int, ultralytics.engine.results.Results, numpy.ndarray): Camera index, its result and the
+        annotated frame (None when rendering is disabled for this camera).
+        """
+        batch = {stage: 0.0 for stage in STAGES}
+        predict_args = dict(self.predict_args, **predict_args)
+        render = self.render if isinstance(self.render, (list, tuple)) else [self.render is not False] * len(frames)
+        for index, result in enumerate(self.model.predict(frames, stream=True, **predict_args)):
+            # Les temps ultralytics sont en ms par image : les sommer donne le coût du lot
+            for stage in STAGES:
+                batch[stage] += result.speed.get(stage) or 0.0
+            annotated = result.plot() if render[index] else None
+            yield index, result, annotated
+        self.batches += 1
+        self.last_batch = batch
+        for stage in STAGES:
+            self._totals[stage] += batch[stage]
+
+    def timings(self):
+        """
+        Returns the mean time per batch of each stage, in milliseconds.
+        """
+        if not self.batches:
+            return {stage: 0.0 for stage in STAGES}
+        return {stage: total / self.batches for stage, total in self._totals.items()}
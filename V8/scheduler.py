@@ -0,0 +1,191 @@
+"""
+Detect-every-k-frames scheduling with optical flow interpolation.
+
+Objects move little from one webcam frame to the next, so a full YOLOv8 forward
+pass on every frame is mostly wasted. DetectionScheduler runs the detector every
+k frames only; in between, the last boxes are propagated with sparse Lucas-Kanade
+optical flow (a few points per box, one cv2.calcOpticalFlowPyrLK call for all
+boxes). The detector also runs early when the tracker loses too many points, and
+k adapts itself to the measured cost of a detection and of a tracking step: it is
+the smallest interval whose mean cost per frame fits in the 1/target_fps budget.
+Time spent waiting for the camera does not count, so a slow source never raises k.
+
+Usage:
+    scheduler = DetectionScheduler(YOLO('yolov8n.pt'), k=5, target_fps=25)
+    boxes, confidences, classes, detected = scheduler.step(frame)
+"""
+import math
+import time
+import warnings
+
+import cv2
+import numpy as np
+
+# Yolov5/rendering.py : le script appelant ajoute le dossier Yolov5 au chemin
+from rendering import default_renderer
+
+
+class BoxFlowTracker:
+    """
+    Propagates boxes between frames with sparse optical flow.
+
+    Args:
+    grid (int): Points tracked per box along each axis (grid x grid points per box).
+    """
+
+    def __init__(self, grid=4):
+        offsets = np.linspace(0.2, 0.8, grid, dtype=np.float32)
+        self._u, self._v = [a.ravel() for a in np.meshgrid(offsets, offsets)]
+        self.boxes = np.zeros((0, 4), np.float32)
+        self._gray = None
+
+    def reset(self, gray, boxes):
+        """
+        Starts tracking new boxes (xyxy, pixels) from a grayscale frame.
+        """
+        self._gray = gray
+        self.boxes = np.asarray(boxes, np.float32).reshape(-1, 4)
+
+    def _points(self):
+        x1, y1, x2, y2 = [c[:, None] for c in self.boxes.T]
+        xs = x1 + self._u * (x2 - x1)
+        ys = y1 + self._v * (y2 - y1)
+        return np.stack([xs, ys], axis=-1).reshape(-1, 1, 2)
+
+    def update(self, gray):
+        """
+        Moves the boxes to the new grayscale frame.
+
+        Returns:
+        (numpy.ndarray, float): The updated boxes and the ratio of points the flow lost.
+        """
+        if len(self.boxes) == 0:
+            self._gray = gray
+            return self.boxes, 0.0
+        points = self._points()
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self._gray, gray, points, None,
+                                                    winSize=(15, 15), maxLevel=2)
+        valid = status.reshape(len(self.boxes), -1).astype(bool)
+        shift = (moved - points).reshape(len(self.boxes), -1, 2)
+        shift[~valid] = np.nan
+        # Médiane des déplacements valides par boîte (0 si tous les points sont perdus)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            median = np.nan_to_num(np.nanmedian(shift, axis=1))
+        self.boxes += np.tile(median, 2)
+        self._gray = gray
+        return self.boxes, 1.0 - valid.mean()
+
+
+class DetectionScheduler:
+    """
+    Runs a YOLOv8 model every k frames and tracks the boxes in between.
+
+    Args:
+    model (ultralytics.YOLO): The loaded model.
+    k (int): Initial detection interval, in frames.
+    target_fps (float): Frame rate the detection and tracking work must sustain, by adapting k.
+    None keeps k fixed.
+    k_min (int), k_max (int): Bounds of the adaptive interval.
+    lost_threshold (float): Ratio of lost flow points which forces a detection.
+    predict_args: Extra arguments for the model call (conf, iou, imgsz...).
+    """
+
+    def __init__(self, model, k=5, target_fps=None, k_min=1, k_max=30, lost_threshold=0.5, **predict_args):
+        self.model = model
+        self.k = k
+        self.target_fps = target_fps
+        self.k_min = k_min
+        self.k_max = k_max
+        self.lost_threshold = lost_threshold
+        self.predict_args = dict(verbose=False, **predict_args)
+        self.tracker = BoxFlowTracker()
+        self.confidences = np.zeros(0, np.float32)
+        self.classes = np.zeros(0, int)
+        self.frames = 0
+        self.detections = 0
+        self.fps = 0.0
+        self.detect_time = None
+        self.track_time = None
+        self._since_detection = None
+        self._last_step = None
+
+    def _detect(self, frame, gray):
+        boxes = self.model(frame, **self.predict_args)[0].boxes
+        self.tracker.reset(gray, boxes.xyxy.cpu().numpy())
+        self.confidences = boxes.conf.cpu().numpy()
+        self.classes = boxes.cls.cpu().numpy().astype(int)
+        self.detections += 1
+        self._since_detection = 0
+
+    def _adapt(self, detected, elapsed):
+        now = time.perf_counter()
+        if self._last_step is not None:
+            # Cadence des appels, attente de la caméra comprise : statistique seulement
+            instant = 1.0 / max(now - self._last_step, 1e-6)
+            self.fps = instant if not self.fps else 0.9 * self.fps + 0.1 * instant
+        self._last_step = now
+        # Coût mesuré d'une détection et d'une image suivie, sans l'attente de la caméra
+        if detected:
+            self.detect_time = elapsed if self.detect_time is None else 0.8 * self.detect_time + 0.2 * elapsed
+        else:
+            self.track_time = elapsed if self.track_time is None else 0.8 * self.track_time + 0.2 * elapsed
+        # k n'est ajusté qu'au moment d'une détection pour éviter les oscillations
+        if self.target_fps and detected and self.track_time is not None:
+            budget = 1.0 / self.target_fps
+            # Plus petit k tel que (détection + (k - 1) suivis) / k tienne dans le budget
+            if self.detect_time <= budget:
+                k = self.k_min
+            elif self.track_time >= budget:
+                k = self.k_max
+            else:
+                k = math.ceil((self.detect_time - self.track_time) / (budget - self.track_time))
+            self.k = min(max(k, self.k_min), self.k_max)
+
+    def step(self, frame, trigger=False):
+        """
+        Processes one frame.
+
+        Args:
+        frame (numpy.ndarray): BGR frame.
+        trigger (bool): Force a detection on this frame (e.g. from a motion gate).
+
+        Returns:
+        (numpy.ndarray, numpy.ndarray, numpy.ndarray, bool): Boxes (xyxy), confidences, class ids,
+        and whether the detector ran on this frame.
+        """
+        start = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        detected = trigger or self._since_detection is None or self._since_detection >= self.k
+        if not detected:
+            _, lost = self.tracker.update(gray)
+            detected = lost > self.lost_threshold
+        if detected:
+            self._detect(frame, gray)
+        self._since_detection += 1
+        self.frames += 1
+        self._adapt(detected, time.perf_counter() - start)
+        # Copie : le suivi modifie les boîtes sur place pendant que l'image précédente est dessinée
+        return self.tracker.boxes.copy(), self.confidences, self.classes, detected
+
+    def stats(self):
+        """
+        Returns the scheduler counters as a dictionary.
+        """
+        return {
+            "frames": self.frames,
+            "detections": self.detections,
+            "detection_ratio": self.detections / self.frames if self.frames else 0.0,
+            "k": self.k,
+            "fps": self.fps,
+            "detect_ms": (self.detect_time or 0.0) * 1000,
+            "track_ms": (self.track_time or 0.0) * 1000,
+        }
+
+
+def draw_detections(frame, boxes, confidences, classes, names, color=(0, 255, 0)):
+    """
+    Draws boxes and labels on a frame in place and returns it.
+    """
+    detections = np.column_stack([np.asarray(boxes, np.float32).reshape(-1, 4), confidences, classes])
+    return default_renderer.draw(frame, detections, names, color, 2)
@@ -1,5 +1,12 @@
 from ultralytics import YOLO
 
+from tracking import TrackLog, run_tracking
+
 model  = YOLO("yolov8s.pt")
 
-ok = model.track(source="https://www.youtube.com/watch?v=Lc8ldWNlyEE&t=819s" , save = True, show = True, conf=0.25 , iou = 0.7)
\ No newline at end of file
+# Suivi en flux, mémoire constante : les pistes sont écrites dans tracks.tracklog
+# (image, id, classe, boîte, confiance) au lieu d'une vidéo annotée dans runs/detect
+with TrackLog("tracks.tracklog") as log:
+    frames = run_tracking(model, "https://www.youtube.com/watch?v=Lc8ldWNlyEE&t=819s", log, show=True,
+                          conf=0.25, iou=0.7)
+print(f"{frames} images, {log.rows_written} positions de pistes enregistrées")
@@ -0,0 +1,177 @@
+"""
+Streaming multi-object tracking with a columnar track log.
+
+model.track(save=True, show=True) re-encodes an annotated video into runs/detect
+and, without stream=True, accumulates the results of the whole run, so memory grows
+with the length of the stream. Here the results are consumed one frame at a time
+(stream=True, persist=True) and only the tracks are kept: frame number, time, track
+id, class, box and confidence. They are buffered in preallocated NumPy columns and
+appended to a log file every `batch_size` rows (or every `flush_seconds`), so memory
+stays constant however long the camera runs.
+
+The log is a sequence of batches, each batch being one .npy array per column
+(np.save), so it can be read back batch by batch, and a run that was killed loses
+at most its last incomplete batch. Frame numbers and track ids restart at zero on
+every run, so a log holds a single run: opening it again truncates it.
+
+Usage:
+    with TrackLog("tracks.tracklog") as log:
+        run_tracking(model, "0", log, conf=0.25, iou=0.7)
+    columns = read_track_log("tracks.tracklog")
+"""
+import time
+
+import cv2
+import numpy as np
+
+# Colonnes du journal : nom -> (type, forme d'une ligne)
+COLUMNS = {
+    "frame": (np.int64, ()),
+    "time": (np.float64, ()),
+    "track_id": (np.int32, ()),
+    "cls": (np.int16, ()),
+    "box": (np.float32, (4,)),
+    "conf": (np.float32, ()),
+}
+
+
+class TrackLog:
+    """
+    Buffers track records in preallocated columns and appends them to a file in batches.
+
+    Args:
+    path (str): The log file, truncated when opened (one log file per run).
+    batch_size (int): Rows per batch written to the file.
+    flush_seconds (float): Write a partial batch when it is older than this, None to wait for a full batch.
+    """
+
+    def __init__(self, path, batch_size=4096, flush_seconds=5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.columns = {name: np.empty((batch_size,) + shape, dtype) for name, (dtype, shape) in COLUMNS.items()}
+        self.size = 0
+        self.rows_written = 0
+        self.batches_written = 0
+        # Un journal par exécution : ids de pistes et numéros d'image repartent de zéro
+        self._file = open(path, "wb")
+        self._last_flush = time.monotonic()
+
+    def append(self, frame, timestamp, track_ids, classes, boxes, confidences):
+        """
+        Adds the tracks of one frame.
+
+        Args:
+        frame (int): Frame number.
+        timestamp (float): Capture time (seconds since the epoch).
+        track_ids, classes, confidences (numpy.ndarray): One value per track.
+        boxes (numpy.ndarray): (n, 4) xyxy boxes in pixels.
+        """
+        count = len(track_ids)
+        start = 0
+        while start < count:
+            # Remplir le lot courant, l'écrire quand il est plein
+            length = min(count - start, self.batch_size - self.size)
+            rows = slice(self.size, self.size + length)
+            self.columns["frame"][rows] = frame
+            self.columns["time"][rows] = timestamp
+            self.columns["track_id"][rows] = track_ids[start:start + length]
+            self.columns["cls"][rows] = classes[start:start + length]
+            self.columns["box"][rows] = boxes[start:start + length]
+            self.columns["conf"][rows] = confidences[start:start + length]
+            self.size += length
+            start += length
+            if self.size == self.batch_size:
+                self.flush()
+        if self.size and self.flush_seconds is not None and time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered rows as one batch.
+        """
+        if self.size:
+            for name in COLUMNS:
+                np.save(self._file, self.columns[name][:self.size], allow_pickle=False)
+            self._file.flush()
+            self.rows_written += self.size
+            self.batches_written += 1
+            self.size = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_track_log(path):
+    """
+    Reads a track log one batch at a time.
+
+    Yields:
+    dict: Column name -> array of the batch.
+    """
+    with open(path, "rb") as file:
+        while True:
+            batch = {}
+            try:
+                for name in COLUMNS:
+                    batch[name] = np.load(file, allow_pickle=False)
+            except (EOFError, ValueError):
+                # Fin du fichier, ou dernier lot tronqué par un arrêt brutal
+                return
+            yield batch
+
+
+def read_track_log(path):
+    """
+    Reads a whole track log.
+
+    Returns:
+    dict: Column name -> array of all the rows.
+    """
+    batches = list(iter_track_log(path))
+    if not batches:
+        return {name: np.empty((0,) + shape, dtype) for name, (dtype, shape) in COLUMNS.items()}
+    return {name: np.concatenate([batch[name] for batch in batches]) for name in COLUMNS}
+
+
+def run_tracking(model, source, log, show=False, max_frames=None, window_name="Tracking", **track_args):
+    """
+    Tracks objects on a source and writes every track to the log, frame by frame.
+
+    Args:
+    model (ultralytics.YOLO): The loaded model.
+    source: Anything model.track() accepts ("0", a video, a stream URL...).
+    log (TrackLog): Where the tracks are written.
+    show (bool): Display the annotated frames (press "q" to stop).
+    max_frames (int): Stop after this many frames, None to run until the source ends.
+    track_args: Extra arguments for model.track() (conf, iou, tracker, imgsz...).
+
+    Returns:
+    int: The number of frames processed.
+    """
+    # stream=True : un générateur, rien n'est accumulé ; persist=True : les pistes continuent d'une image à l'autre
+    results = model.track(source=source, stream=True, persist=True, save=False, show=False,
+                          verbose=False, **track_args)
+    frames = 0
+    for frames, result in enumerate(results, 1):
+        boxes = result.boxes
+        if boxes is not None and boxes.id is not None:
+            log.append(frames - 1, time.time(), boxes.id.int().cpu().numpy(), boxes.cls.int().cpu().numpy(),
+                       boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy())
+        if show:
+            cv2.imshow(window_name, result.plot())
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+        if max_frames and frames >= max_frames:
+            break
+    if show:
+        cv2.destroyWindow(window_name)
+    return frames
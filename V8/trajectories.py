@@ -0,0 +1,338 @@
+"""
+Queryable store of tracked trajectories.
+
+The points of every track are kept in preallocated NumPy columns (time, x, y,
+track index, previous point of the same track), grown by doubling, and each track
+has a small __slots__ record (class, first and last time, number of points). Two
+indexes make the queries vectorized instead of Python loops over points:
+
+- time: points are appended in time order, so a time window is a searchsorted slice
+  (an argsort is built lazily if points ever arrive out of order);
+- space: a uniform grid over the frame, stored CSR-style (points sorted by cell and
+  the start of each cell), rebuilt lazily after new points are added.
+
+A query uses whichever index selects fewer candidates, then applies the other
+criteria and an exact point-in-polygon test on those candidates only. The position
+of a detection is the bottom centre of its box, where the object touches the floor.
+
+Usage:
+    store = TrajectoryStore.from_track_log("tracks.tracklog", width=1920, height=1080)
+    entered = store.tracks_entering(door, t1, t2)
+    dwell = store.dwell_times(counter_zone)
+"""
+import numpy as np
+
+from tracking import iter_track_log
+
+_COLUMNS = {"t": np.float64, "x": np.float32, "y": np.float32, "track": np.int32, "prev": np.int64}
+
+
+class Track:
+    """
+    Summary of one track; its points are in the columns of the store.
+    """
+    __slots__ = ("track_id", "index", "cls", "first_time", "last_time", "count", "last_row")
+
+    def __init__(self, track_id, index, cls, timestamp):
+        self.track_id = track_id
+        self.index = index
+        self.cls = cls
+        self.first_time = timestamp
+        self.last_time = timestamp
+        self.count = 0
+        self.last_row = -1
+
+    def __repr__(self):
+        return (f"Track(id={self.track_id}, cls={self.cls}, points={self.count}, "
+                f"{self.first_time:.3f}-{self.last_time:.3f})")
+
+
+def points_in_polygon(x, y, polygon):
+    """
+    Even-odd test of many points against one polygon, vectorized over the points.
+
+    Args:
+    x, y (numpy.ndarray): Point coordinates.
+    polygon (list): (x, y) vertices.
+
+    Returns:
+    numpy.ndarray: A boolean per point.
+    """
+    polygon = np.asarray(polygon, np.float64)
+    inside = np.zeros(len(x), bool)
+    x0, y0 = polygon[-1]
+    for x1, y1 in polygon:
+        crosses = (y1 > y) != (y0 > y)
+        # Abscisse où le bord coupe l'horizontale du point (bords horizontaux : crosses est faux)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = (x0 - x1) * (y - y1) / (y0 - y1) + x1
+        inside ^= crosses & (x < x_cross)
+        x0, y0 = x1, y1
+    return inside
+
+
+class TrajectoryStore:
+    """
+    Array-backed trajectories with a time index and a grid spatial index.
+
+    Args:
+    width, height (int): Frame size covered by the grid (points outside go to the border cells).
+    cell_size (float): Side of a grid cell in pixels.
+    capacity (int): Points preallocated; the columns double when full.
+    """
+
+    def __init__(self, width=1920, height=1080, cell_size=64, capacity=1 << 20):
+        self.cell_size = float(cell_size)
+        self.columns_count = max(int(np.ceil(width / cell_size)), 1)
+        self.rows_count = max(int(np.ceil(height / cell_size)), 1)
+        self.size = 0
+        self.tracks = {}
+        self._by_index = []
+        self._columns = {name: np.empty(capacity, dtype) for name, dtype in _COLUMNS.items()}
+        self._time_sorted = True
+        self._time_order = None
+        self._grid = None
+
+    @classmethod
+    def from_track_log(cls, path, **kwargs):
+        """
+        Builds a store from a log written by tracking.TrackLog, one batch at a time.
+        """
+        store = cls(**kwargs)
+        for batch in iter_track_log(path):
+            store.extend(batch["time"], batch["track_id"], batch["cls"], batch["box"])
+        return store
+
+    def __len__(self):
+        return self.size
+
+    # Vues sur la partie remplie des colonnes
+    @property
+    def t(self):
+        return self._columns["t"][:self.size]
+
+    @property
+    def x(self):
+        return self._columns["x"][:self.size]
+
+    @property
+    def y(self):
+        return self._columns["y"][:self.size]
+
+    @property
+    def track(self):
+        return self._columns["track"][:self.size]
+
+    @property
+    def prev(self):
+        return self._columns["prev"][:self.size]
+
+    def append(self, timestamp, track_ids, classes, boxes):
+        """
+        Adds the tracks of one frame.
+
+        Args:
+        timestamp (float): Time of the frame.
+        track_ids, classes (numpy.ndarray): One value per track.
+        boxes (numpy.ndarray): (n, 4) xyxy boxes in pixels.
+        """
+        self.extend(np.full(len(track_ids), timestamp), track_ids, classes, boxes)
+
+    def extend(self, times, track_ids, classes, boxes):
+        """
+        Adds many points at once, in time order (e.g. a batch of the track log).
+        """
+        count = len(track_ids)
+        if count == 0:
+            return
+        times = np.asarray(times, np.float64)
+        boxes = np.asarray(boxes, np.float32).reshape(-1, 4)
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        rows = np.arange(start, end)
+
+        # Index dense de chaque piste : une itération Python par piste, pas par point
+        unique_ids, inverse = np.unique(np.asarray(track_ids), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind="stable")
+        grouped = inverse[order]
+        first = np.ones(count, bool)
+        first[1:] = grouped[1:] != grouped[:-1]
+        tracks = [self._track(int(track_id), float(timestamp))
+                  for track_id, timestamp in zip(unique_ids, times[order[first]])]
+        dense = np.array([track.index for track in tracks], np.int32)[inverse]
+        last_rows = np.array([track.last_row for track in tracks], np.int64)
+
+        # Point précédent de la même piste : le point d'avant dans ce lot, sinon le dernier point connu
+        prev_sorted = np.empty(count, np.int64)
+        prev_sorted[1:] = rows[order][:-1]
+        prev_sorted[first] = last_rows[grouped[first]]
+        prev = np.empty(count, np.int64)
+        prev[order] = prev_sorted
+
+        last_in_group = np.ones(count, bool)
+        last_in_group[:-1] = grouped[1:] != grouped[:-1]
+        counts = np.bincount(inverse, minlength=len(tracks))
+        for position, track_position in zip(np.flatnonzero(last_in_group), grouped[last_in_group]):
+            track = tracks[track_position]
+            row = int(rows[order[position]])
+            track.last_row = row
+            track.last_time = float(times[row - start])
+            track.cls = int(classes[row - start])
+            track.count += int(counts[track_position])
+
+        columns = self._columns
+        if (self.size and times[0] < columns["t"][self.size - 1]) or np.any(np.diff(times) < 0):
+            self._time_sorted = False
+        columns["t"][start:end] = times
+        columns["x"][start:end] = (boxes[:, 0] + boxes[:, 2]) / 2
+        columns["y"][start:end] = boxes[:, 3]
+        columns["track"][start:end] = dense
+        columns["prev"][start:end] = prev
+        self.size = end
+        self._time_order = None
+        self._grid = None
+
+    def _track(self, track_id, timestamp):
+        track = self.tracks.get(track_id)
+        if track is None:
+            track = Track(track_id, len(self._by_index), -1, timestamp)
+            self.tracks[track_id] = track
+            self._by_index.append(track)
+        return track
+
+    def _reserve(self, count):
+        capacity = len(self._columns["t"])
+        if self.size + count <= capacity:
+            return
+        while capacity < self.size + count:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, column.dtype)
+            grown[:self.size] = column[:self.size]
+            self._columns[name] = grown
+
+    def _cells(self, x, y):
+        column = np.clip((x / self.cell_size).astype(np.int64), 0, self.columns_count - 1)
+        row = np.clip((y / self.cell_size).astype(np.int64), 0, self.rows_count - 1)
+        return row * self.columns_count + column
+
+    def _time_slice(self, t1, t2):
+        """
+        Returns the rows with t1 <= t <= t2, as a slice when the points are in time order.
+        """
+        t = self.t
+        if self._time_sorted:
+            start = 0 if t1 is None else int(np.searchsorted(t, t1, "left"))
+            end = self.size if t2 is None else int(np.searchsorted(t, t2, "right"))
+            return np.arange(start, end)
+        if self._time_order is None:
+            self._time_order = np.argsort(t, kind="stable")
+        sorted_t = t[self._time_order]
+        start = 0 if t1 is None else int(np.searchsorted(sorted_t, t1, "left"))
+        end = self.size if t2 is None else int(np.searchsorted(sorted_t, t2, "right"))
+        return np.sort(self._time_order[start:end])
+
+    def _grid_candidates(self, polygon):
+        """
+        Returns (estimated count, function returning the rows) of the cells covering the polygon.
+        """
+        if self._grid is None:
+            cells = self._cells(self.x, self.y)
+            order = np.argsort(cells, kind="stable")
+            starts = np.searchsorted(cells[order], np.arange(self.columns_count * self.rows_count + 1))
+            self._grid = (order, starts)
+        order, starts = self._grid
+        polygon = np.asarray(polygon, np.float64)
+        (column0, column1), (row0, row1) = (
+            np.clip((np.array([polygon[:, axis].min(), polygon[:, axis].max()]) / self.cell_size).astype(np.int64),
+                    0, limit - 1)
+            for axis, limit in ((0, self.columns_count), (1, self.rows_count)))
+        # Une ligne de cellules contiguës = une tranche de l'index
+        ranges = [(starts[row * self.columns_count + column0], starts[row * self.columns_count + column1 + 1])
+                  for row in range(row0, row1 + 1)]
+        count = sum(end - start for start, end in ranges)
+        return count, lambda: np.concatenate([order[start:end] for start, end in ranges])
+
+    def query(self, polygon=None, t1=None, t2=None):
+        """
+        Returns the rows of the points inside the polygon between t1 and t2 (inclusive).
+
+        Args:
+        polygon (list): (x, y) vertices, None for the whole frame.
+        t1, t2 (float): Time window, None for no bound.
+
+        Returns:
+        numpy.ndarray: Row indices, in time order when the points were appended in time order.
+        """
+        if polygon is None:
+            return self._time_slice(t1, t2)
+        grid_count, grid_rows = self._grid_candidates(polygon)
+        if t1 is None and t2 is None:
+            rows = np.sort(grid_rows())
+        else:
+            time_rows = self._time_slice(t1, t2)
+            if len(time_rows) <= grid_count:
+                rows = time_rows
+            else:
+                rows = np.sort(grid_rows())
+                t = self.t[rows]
+                keep = np.ones(len(rows), bool)
+                if t1 is not None:
+                    keep &= t >= t1
+                if t2 is not None:
+                    keep &= t <= t2
+                rows = rows[keep]
+        return rows[points_in_polygon(self.x[rows], self.y[rows], polygon)]
+
+    def tracks_in(self, polygon, t1=None, t2=None):
+        """
+        Returns the ids of the tracks with at least one point inside the polygon between t1 and t2.
+        """
+        rows = self.query(polygon, t1, t2)
+        return [self._by_index[index].track_id for index in np.unique(self.track[rows])]
+
+    def tracks_entering(self, polygon, t1=None, t2=None):
+        """
+        Returns the ids of the tracks that entered the polygon between t1 and t2: a point inside
+        whose previous point was outside, or the first point of a track that appears inside.
+        """
+        rows = self.query(polygon, t1, t2)
+        prev = self.prev[rows]
+        has_prev = prev >= 0
+        prev_inside = np.zeros(len(rows), bool)
+        prev_inside[has_prev] = points_in_polygon(self.x[prev[has_prev]], self.y[prev[has_prev]], polygon)
+        entering = rows[~prev_inside]
+        return [self._by_index[index].track_id for index in np.unique(self.track[entering])]
+
+    def dwell_times(self, polygon=None, t1=None, t2=None, max_gap=1.0):
+        """
+        Returns the time each track spent inside the polygon (or in view) between t1 and t2.
+
+        The time between two consecutive points of a track counts when both are inside, unless
+        the track was lost for more than max_gap seconds in between.
+
+        Returns:
+        dict: Track id -> seconds.
+        """
+        rows = self.query(polygon, t1, t2)
+        prev = self.prev[rows]
+        keep = prev >= 0
+        rows, prev = rows[keep], prev[keep]
+        if polygon is not None:
+            inside = points_in_polygon(self.x[prev], self.y[prev], polygon)
+            rows, prev = rows[inside], prev[inside]
+        start = self.t[prev]
+        if t1 is not None:
+            start = np.maximum(start, t1)
+        duration = self.t[rows] - start
+        duration[duration > max_gap] = 0.0
+        totals = np.bincount(self.track[rows], weights=duration, minlength=len(self._by_index))
+        return {self._by_index[index].track_id: float(totals[index]) for index in np.flatnonzero(totals)}
+
+    def trajectory(self, track_id):
+        """
+        Returns the (t, x, y) arrays of one track.
+        """
+        rows = np.flatnonzero(self.track == self.tracks[track_id].index)
+        return self.t[rows], self.x[rows], self.y[rows]
@@ -0,0 +1,66 @@
+"""
+Batched detection of many uploaded images.
+
+Calling the model once per uploaded image makes one forward pass (and one
+preprocessing and NMS) per image. Here the uploads are decoded by a thread pool,
+a bounded number of images ahead, and grouped in chunks of `batch_size` images
+that run through the model in one call. The caller gets each chunk as soon as it
+is ready, so the results can be shown while the next chunk is detected.
+
+Usage:
+    for chunk in chunked(decode_uploads(uploaded_files), batch_size=16):
+        names, images, arrays = zip(*chunk)
+        results = model(list(arrays), size=640).tolist()
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+
+def _decode(file):
+    try:
+        image = Image.open(file).convert('RGB')
+    except (OSError, ValueError):
+        # Fichier illisible ou qui n'est pas une image
+        return None, None
+    return image, np.asarray(image)
+
+
+def decode_uploads(files, workers=4, prefetch=32):
+    """
+    Decodes uploaded files in parallel, in upload order.
+
+    Args:
+    files (list): Uploaded files (Streamlit UploadedFile or anything PIL can open).
+    workers (int): Number of decoding threads.
+    prefetch (int): Maximum number of images decoded ahead, which bounds the memory use.
+
+    Yields:
+    (str, PIL.Image.Image, numpy.ndarray): Name, RGB image and its array; None, None if it cannot be decoded.
+    """
+    with ThreadPoolExecutor(workers) as pool:
+        pending = deque()
+        for file in files:
+            pending.append((getattr(file, "name", str(file)), pool.submit(_decode, file)))
+            if len(pending) >= prefetch:
+                name, future = pending.popleft()
+                yield (name,) + future.result()
+        while pending:
+            name, future = pending.popleft()
+            yield (name,) + future.result()
+
+
+def chunked(items, batch_size):
+    """
+    Groups an iterable in lists of batch_size items (the last one may be shorter).
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == batch_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,70 @@
+"""
+Vectorized counting of detected classes.
+
+Looping over the detections in Python (int(det[5]) and a dict lookup for each)
+costs thousands of tensor indexings per image on dense scenes. Here the class
+columns of every image of a batch are counted by a single bincount. The result
+is an (images x classes) matrix, and ClassCounter sums these matrices over a
+whole upload or video.
+
+Usage:
+    counts = count_matrix([result.xyxy[0] for result in batch_results], len(model.names))
+    counter.update(counts)
+    st.table(counts_to_dict(counter.totals, model.names).items())
+"""
+import numpy as np
+import torch
+
+
+def count_matrix(detections, num_classes):
+    """
+    Counts the detections of each class on several images at once.
+
+    Args:
+    detections (list): One (n, 6) tensor or array per image (x1, y1, x2, y2, confidence, class).
+    num_classes (int): Number of classes of the model.
+
+    Returns:
+    numpy.ndarray: (images, classes) matrix of counts.
+    """
+    if not detections:
+        return np.zeros((0, num_classes), np.int64)
+    classes = [torch.as_tensor(boxes)[:, 5].long().cpu() for boxes in detections]
+    lengths = torch.tensor([len(image_classes) for image_classes in classes])
+    images = torch.repeat_interleave(torch.arange(len(classes)), lengths)
+    # Une case par couple (image, classe) : un seul bincount pour tout le lot
+    flat = images * num_classes + torch.cat(classes)
+    counts = torch.bincount(flat, minlength=len(classes) * num_classes)
+    return counts.reshape(len(classes), num_classes).numpy()
+
+
+def counts_to_dict(counts, class_names):
+    """
+    Converts a row of counts to a {class name: count} dict of the detected classes.
+    """
+    return {class_names[index]: int(counts[index]) for index in np.flatnonzero(counts)}
+
+
+class ClassCounter:
+    """
+    Running count of each class over many images (an upload session, a video).
+
+    Args:
+    num_classes (int): Number of classes of the model.
+    """
+
+    def __init__(self, num_classes):
+        self.totals = np.zeros(num_classes, np.int64)
+        self.images = 0
+
+    def update(self, counts):
+        """
+        Adds an (images, classes) count matrix and returns it.
+        """
+        counts = np.asarray(counts).reshape(-1, len(self.totals))
+        self.totals += counts.sum(0)
+        self.images += len(counts)
+        return counts
+
+    def mean_per_image(self):
+        return self.totals / max(self.images, 1)
@@ -0,0 +1,181 @@
+"""
+Local registry of YOLOv5 models, for a fast and offline cold start.
+
+torch.hub.load('ultralytics/yolov5', name) queries GitHub, imports the hub repo and
+rebuilds the model from its weights at every start, and fails on machines without
+network. The registry resolves a model name in a local cache directory instead
+(YOLO_MODELS, ~/.cache/yolo-models by default):
+
+    yolov5/             copy of the ultralytics/yolov5 repo (its classes are needed to load the models)
+    yolov5s.module.pt   the whole AutoShape model serialized with torch.save (fastest)
+    yolov5s.pt          or only the weights, built through the local repo
+
+Resolution order: serialized module, local weights (the module is then serialized for
+the next start), and torch.hub over the network last, unless YOLO_OFFLINE is set. A
+model downloaded from the hub is added to the cache. Models are loaded on first use
+(LazyModel) and the cold start is measured: where the model came from, the load time
+and the time of the first inference.
+
+Fill the cache on a machine with network, then copy the directory to the air-gapped nodes:
+    python Yolov5/model_registry.py yolov5s yolov5l yolov5x
+"""
+import os
+import shutil
+import sys
+import time
+
+import torch
+
+CACHE_DIR = os.environ.get("YOLO_MODELS", os.path.join(os.path.expanduser("~"), ".cache", "yolo-models"))
+OFFLINE = bool(os.environ.get("YOLO_OFFLINE"))
+HUB_REPO = "ultralytics/yolov5"
+
+# Modèles déjà créés dans ce processus (Streamlit ré-exécute les scripts à chaque interaction)
+_models = {}
+
+
+def _repo_dir(cache_dir):
+    """
+    Returns the local copy of the yolov5 repo: the one of the cache, else the torch.hub one, else None.
+    """
+    for path in (os.path.join(cache_dir, "yolov5"), os.path.join(torch.hub.get_dir(), "ultralytics_yolov5_master")):
+        if os.path.isfile(os.path.join(path, "hubconf.py")):
+            return path
+    return None
+
+
+def _torch_load(path):
+    try:
+        return torch.load(path, map_location="cpu", weights_only=False)
+    except TypeError:
+        # torch < 1.13 : pas d'argument weights_only
+        return torch.load(path, map_location="cpu")
+
+
+def save_to_cache(model, name, cache_dir=CACHE_DIR):
+    """
+    Serializes a loaded model in the cache, with a copy of the yolov5 repo if the cache has none.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    repo = _repo_dir(cache_dir)
+    cached_repo = os.path.join(cache_dir, "yolov5")
+    if repo and repo != cached_repo:
+        shutil.copytree(repo, cached_repo, ignore=shutil.ignore_patterns(".git", "__pycache__"))
+    try:
+        torch.save(model, os.path.join(cache_dir, f"{name}.module.pt"))
+    except Exception as error:
+        # Le cache est une optimisation : le modèle reste utilisable
+        print(f"Impossible d'enregistrer {name} dans le cache : {error}")
+
+
+def load_model(name, cache_dir=CACHE_DIR, offline=OFFLINE, device=None):
+    """
+    Loads a YOLOv5 model from the local cache, or from torch.hub when it is not cached.
+
+    Args:
+    name (str): Name of the model (e.g., 'yolov5s', 'yolov5x').
+    cache_dir (str): The cache directory.
+    offline (bool): Never use the network; raises FileNotFoundError if the model is not cached.
+    device (str): Torch device to move the model to, None to keep it on the CPU.
+
+    Returns:
+    (model, str): The AutoShape model and where it came from ("module", "weights" or "hub").
+    """
+    repo = _repo_dir(cache_dir)
+    module_path = os.path.join(cache_dir, f"{name}.module.pt")
+    weights_path = os.path.join(cache_dir, f"{name}.pt")
+    if repo and os.path.isfile(module_path):
+        # Les classes du modèle (models.common...) viennent du repo local
+        if repo not in sys.path:
+            sys.path.insert(0, repo)
+        model, source = _torch_load(module_path), "module"
+    elif repo and os.path.isfile(weights_path):
+        model, source = torch.hub.load(repo, "custom", path=weights_path, source="local", verbose=False), "weights"
+        save_to_cache(model, name, cache_dir)
+    elif offline:
+        raise FileNotFoundError(f"Model {name} is not in {cache_dir}; fill the cache with "
+                                f"'python Yolov5/model_registry.py {name}' on a machine with network")
+    else:
+        model, source = torch.hub.load(HUB_REPO, name, pretrained=True), "hub"
+        save_to_cache(model, name, cache_dir)
+    if device:
+        model.to(device)
+    return model, source
+
+
+class LazyModel:
+    """
+    A YOLOv5 model loaded on first use, which measures its cold start.
+
+    Calls and attributes (names, conf, iou...) are forwarded to the loaded model.
+
+    Args:
+    name (str): Name of the model.
+    load_args: Arguments of load_model() (cache_dir, offline, device).
+    """
+    _own = ("name", "_load_args", "_model", "source", "load_seconds", "first_inference_seconds")
+
+    def __init__(self, name, **load_args):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "_load_args", load_args)
+        object.__setattr__(self, "_model", None)
+        object.__setattr__(self, "source", None)
+        object.__setattr__(self, "load_seconds", None)
+        object.__setattr__(self, "first_inference_seconds", None)
+
+    def load(self):
+        """
+        Loads the model if needed and returns it.
+        """
+        if self._model is None:
+            start = time.perf_counter()
+            model, source = load_model(self.name, **self._load_args)
+            object.__setattr__(self, "load_seconds", time.perf_counter() - start)
+            object.__setattr__(self, "source", source)
+            object.__setattr__(self, "_model", model)
+            print(f"Modèle {self.name} chargé ({source}) en {self.load_seconds:.2f} s")
+        return self._model
+
+    def __call__(self, *args, **kwargs):
+        model = self.load()
+        if self.first_inference_seconds is not None:
+            return model(*args, **kwargs)
+        # Première inférence : initialisation des noyaux, allocations
+        start = time.perf_counter()
+        results = model(*args, **kwargs)
+        object.__setattr__(self, "first_inference_seconds", time.perf_counter() - start)
+        print(f"Première inférence {self.name} en {self.first_inference_seconds:.2f} s")
+        return results
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+    def __setattr__(self, name, value):
+        if name in self._own:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.load(), name, value)
+
+    def cold_start(self):
+        """
+        Returns the cold start measurements, in seconds.
+        """
+        return {"model": self.name, "source": self.source, "load_s": self.load_seconds,
+                "first_inference_s": self.first_inference_seconds}
+
+
+def get_model(name, **load_args):
+    """
+    Returns the LazyModel of a name, shared by every caller of the process.
+    """
+    if name not in _models:
+        _models[name] = LazyModel(name, **load_args)
+    return _models[name]
+
+
+if __name__ == "__main__":
+    # Remplir le cache : python Yolov5/model_registry.py yolov5s yolov5x
+    for model_name in sys.argv[1:] or ["yolov5s"]:
+        start = time.perf_counter()
+        _, origin = load_model(model_name)
+        print(f"{model_name}: {origin}, {time.perf_counter() - start:.2f} s -> {CACHE_DIR}")
@@ -0,0 +1,193 @@
+"""
+Cache of raw YOLOv5 predictions, to change the thresholds without re-running the model.
+
+Setting model.conf / model.iou and calling the model again repeats the whole forward
+pass for every image each time a slider moves. Here the forward pass runs once per
+image and model: the candidates before NMS (box, confidence = objectness x best class
+score, class) are kept in an LRU cache, keyed by a hash of the image content, the
+model name and the input size. A threshold change then only re-filters the cached
+candidates and runs torchvision.ops.batched_nms, a few milliseconds per image.
+
+The preprocessing (letterbox) and the candidate selection follow AutoShape and
+non_max_suppression of YOLOv5 (one class per box). AutoShape letterboxes a whole
+batch to the shape of its largest image, so the same image would give slightly
+different boxes depending on its batch mates; here the images are batched only with
+images of the same letterbox shape, which depends on the image shape and size alone.
+The cached candidates therefore match model(img, size=size) run on the image alone,
+for any confidence threshold above min_conf, whatever the batch it came with.
+
+Usage:
+    candidates = default_cache.predict(model, [img], "yolov5s")[0]
+    boxes = filter_predictions(candidates, conf_threshold=0.25, iou_threshold=0.45)
+"""
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+import torch
+import torchvision
+
+
+class CachedDetections:
+    """
+    Detections of one image, with the xyxy / names attributes of YOLOv5 results.
+
+    Args:
+    boxes (torch.Tensor): (n, 6) detections: x1, y1, x2, y2, confidence, class.
+    names (list): Class names of the model.
+    """
+
+    def __init__(self, boxes, names):
+        self.xyxy = [boxes]
+        self.names = names
+        self.n = 1
+
+    def __len__(self):
+        return self.n
+
+
+def _letterbox(img, shape):
+    """
+    Resizes an image into shape (height, width), keeping its aspect ratio, padded with gray.
+    """
+    height, width = img.shape[:2]
+    ratio = min(shape[0] / height, shape[1] / width)
+    new_width, new_height = round(width * ratio), round(height * ratio)
+    pad_x, pad_y = (shape[1] - new_width) / 2, (shape[0] - new_height) / 2
+    if (width, height) != (new_width, new_height):
+        img = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    top, bottom = round(pad_y - 0.1), round(pad_y + 0.1)
+    left, right = round(pad_x - 0.1), round(pad_x + 0.1)
+    return cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+
+
+def _candidates(prediction, input_shape, image_shape, min_conf):
+    """
+    Selects the candidates of one image and scales their boxes back to the image.
+
+    Returns:
+    torch.Tensor: (n, 6) candidates on the CPU: x1, y1, x2, y2, confidence, class.
+    """
+    confidences, classes = (prediction[:, 5:] * prediction[:, 4:5]).max(1)
+    keep = confidences > min_conf
+    xywh = prediction[keep, :4].float()
+    boxes = torch.cat([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], 1)
+    # Même calcul que scale_boxes de YOLOv5 : retirer la bordure puis le facteur d'échelle
+    gain = min(input_shape[0] / image_shape[0], input_shape[1] / image_shape[1])
+    pad_x = (input_shape[1] - image_shape[1] * gain) / 2
+    pad_y = (input_shape[0] - image_shape[0] * gain) / 2
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad_x) / gain).clamp(0, image_shape[1])
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad_y) / gain).clamp(0, image_shape[0])
+    return torch.cat([boxes, confidences[keep, None].float(), classes[keep, None].float()], 1).cpu()
+
+
+def filter_predictions(candidates, conf_threshold, iou_threshold, max_det=1000):
+    """
+    Applies the confidence threshold and a class-aware NMS to cached candidates.
+
+    Args:
+    candidates (torch.Tensor): (n, 6) candidates from PredictionCache.predict().
+    conf_threshold (float): The confidence threshold for detections.
+    iou_threshold (float): The Intersection over Union (IoU) threshold for non-maximum suppression.
+    max_det (int): Maximum number of detections kept.
+
+    Returns:
+    torch.Tensor: (n, 6) detections sorted by decreasing confidence.
+    """
+    candidates = candidates[candidates[:, 4] > conf_threshold]
+    keep = torchvision.ops.batched_nms(candidates[:, :4], candidates[:, 4], candidates[:, 5].long(), iou_threshold)
+    return candidates[keep[:max_det]]
+
+
+class PredictionCache:
+    """
+    LRU cache of the candidates before NMS, per image content, model and input size.
+    Safe to share between threads (Streamlit runs each session on its own thread).
+
+    Args:
+    max_entries (int): Number of images kept.
+    min_conf (float): Candidates below this confidence are not stored.
+    """
+
+    def __init__(self, max_entries=256, min_conf=0.001):
+        self.max_entries = max_entries
+        self.min_conf = min_conf
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(img, model_name, size):
+        digest = hashlib.blake2b(np.ascontiguousarray(img).data, digest_size=16)
+        digest.update(repr((img.shape, model_name, size)).encode())
+        return digest.hexdigest()
+
+    def predict(self, model, imgs, model_name, size=640):
+        """
+        Returns the candidates of each image, running the images not in the cache in one batch.
+
+        Args:
+        model: The YOLOv5 model (AutoShape).
+        imgs (list): RGB images (numpy.ndarray).
+        model_name (str): Name of the model, part of the cache key.
+        size (int): Model input size.
+
+        Returns:
+        list: One (n, 6) candidates tensor per image.
+        """
+        keys = [self.key(img, model_name, size) for img in imgs]
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+            missing = [index for index, key in enumerate(keys) if key not in found]
+            self.hits += len(imgs) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            # Forward hors du verrou : les autres sessions continuent de lire le cache
+            computed = self._forward(model, [imgs[index] for index in missing], size)
+            with self._lock:
+                for index, candidates in zip(missing, computed):
+                    found[keys[index]] = candidates
+                    self._entries[keys[index]] = candidates
+                    self._entries.move_to_end(keys[index])
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        # Résultats pris dans le dict local : une éviction (même de ce lot) ne les perd pas
+        return [found[key] for key in keys]
+
+    def _forward(self, model, imgs, size):
+        # Forme d'entrée de chaque image seule, comme AutoShape : mise à l'échelle, multiple du stride.
+        # Un forward par forme : le résultat d'une image ne dépend pas des autres images du lot
+        stride = int(getattr(model, "stride", 32))
+        groups = {}
+        for index, img in enumerate(imgs):
+            scaled = [side * size / max(img.shape[:2]) for side in img.shape[:2]]
+            input_shape = tuple(math.ceil(int(side) / stride) * stride for side in scaled)
+            groups.setdefault(input_shape, []).append(index)
+        parameter = next(model.model.parameters())
+        results = [None] * len(imgs)
+        for input_shape, indices in groups.items():
+            batch = np.stack([_letterbox(imgs[index][..., :3], input_shape) for index in indices]).transpose((0, 3, 1, 2))
+            x = torch.from_numpy(np.ascontiguousarray(batch)).to(parameter.device).type_as(parameter) / 255
+            with torch.no_grad():
+                prediction = model.model(x)
+            if isinstance(prediction, (list, tuple)):
+                prediction = prediction[0]
+            for row, index in enumerate(indices):
+                results[index] = _candidates(prediction[row], input_shape, imgs[index].shape[:2], self.min_conf)
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+# Cache partagé par le processus (Streamlit ré-exécute le script à chaque mouvement d'un curseur)
+default_cache = PredictionCache()
@@ -0,0 +1,113 @@
+"""
+Fast drawing of detection boxes and labels.
+
+Drawing with PIL box by box (int() on every coordinate, a new label string, a font
+loaded at every call) costs more than the detection itself on crowded images. Here
+the detections are converted to one NumPy array in a single step. Boxes are drawn
+with OpenCV directly in the image buffer, and every label ("person 0.87") is
+rendered once as a glyph mask and cached. Later frames only copy the cached mask
+into the image.
+
+Usage:
+    image = default_renderer.draw(np.array(image), results.xyxy[0], model.names, '#FF0000', 2)
+"""
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+@lru_cache(maxsize=64)
+def parse_color(color):
+    """
+    Converts '#RRGGBB' (or an (r, g, b) tuple) to an (r, g, b) tuple.
+    """
+    if isinstance(color, str):
+        color = color.lstrip('#')
+        return tuple(int(color[index:index + 2], 16) for index in (0, 2, 4))
+    return tuple(int(value) for value in color)
+
+
+def detections_to_array(detections):
+    """
+    Converts detections (torch.Tensor, numpy.ndarray or list) to an (n, 6) float32 array in one step.
+    """
+    if hasattr(detections, "cpu"):
+        detections = detections.cpu().numpy()
+    return np.asarray(detections, np.float32).reshape(-1, 6)
+
+
+class BoxRenderer:
+    """
+    Draws boxes and labels on images, with a cache of the rendered label glyphs.
+
+    Args:
+    font_scale (float): OpenCV font scale of the labels.
+    thickness (int): Stroke thickness of the label text.
+    max_labels (int): Number of label glyphs kept in the cache.
+    """
+
+    def __init__(self, font_scale=0.5, thickness=1, max_labels=20000):
+        self.font_scale = font_scale
+        self.thickness = thickness
+        self.max_labels = max_labels
+        # Hauteur commune à tous les libellés, pour les aligner au-dessus des boîtes
+        (_, self.text_height), self.baseline = cv2.getTextSize("Ag", FONT, font_scale, thickness)
+        self._glyphs = {}
+
+    def glyph(self, text):
+        """
+        Returns the boolean mask of a rendered label, from the cache when possible.
+        """
+        mask = self._glyphs.get(text)
+        if mask is None:
+            (width, _), _ = cv2.getTextSize(text, FONT, self.font_scale, self.thickness)
+            canvas = np.zeros((self.text_height + self.baseline + 2, width + 2), np.uint8)
+            cv2.putText(canvas, text, (1, self.text_height + 1), FONT, self.font_scale, 255, self.thickness,
+                        cv2.LINE_AA)
+            mask = canvas > 96
+            if len(self._glyphs) >= self.max_labels:
+                self._glyphs.clear()
+            self._glyphs[text] = mask
+        return mask
+
+    def draw(self, image, detections, class_names, color='#FF0000', box_width=2):
+        """
+        Draws the detections on an image in place.
+
+        Args:
+        image (numpy.ndarray): RGB (or BGR) image, writable and contiguous.
+        detections: (n, 6) detections: x1, y1, x2, y2, confidence, class.
+        class_names (list | dict): Class names of the model.
+        color (str | tuple): '#RRGGBB' or a tuple in the channel order of the image.
+        box_width (int): Width of the box outlines.
+
+        Returns:
+        numpy.ndarray: The image.
+        """
+        detections = detections_to_array(detections)
+        if not len(detections):
+            return image
+        color = parse_color(color)
+        height, width = image.shape[:2]
+        boxes = detections[:, :4].round().astype(np.int32)
+        classes = detections[:, 5].astype(np.int32)
+        # Confiance au centième : c'est ce qui est affiché, et cela borne le nombre de libellés différents
+        confidences = np.rint(detections[:, 4] * 100).astype(np.int32)
+        # Les plus confiantes en dernier, donc au-dessus
+        for (x1, y1, x2, y2), cls, confidence in zip(boxes[::-1].tolist(), classes[::-1].tolist(),
+                                                     confidences[::-1].tolist()):
+            cv2.rectangle(image, (x1, y1), (x2, y2), color, box_width)
+            mask = self.glyph(f"{class_names[cls]} {confidence / 100:.2f}")
+            # Libellé au-dessus de la boîte, ramené dans l'image
+            top = min(max(y1 - mask.shape[0], 0), max(height - mask.shape[0], 0))
+            left = min(max(x1, 0), max(width - mask.shape[1], 0))
+            region = image[top:top + mask.shape[0], left:left + mask.shape[1]]
+            region[mask[:region.shape[0], :region.shape[1]]] = color
+        return image
+
+
+# Renderer partagé : ses libellés en cache servent à toutes les images du processus
+default_renderer = BoxRenderer()
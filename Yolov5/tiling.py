@@ -0,0 +1,110 @@
+"""
+Tiled inference for high-resolution images.
+
+At size=640 a 4K image is downscaled six times and small objects disappear. Here
+the image is cut into overlapping tiles of the model input size, which run at their
+native resolution in batches of `batch_size` tiles. The tiles are views of the image,
+so the extra memory is bounded by the tile batch, not by the image size. The
+detections of every tile (plus one downscaled pass over the whole image for the
+objects larger than a tile) are shifted to image coordinates. They are then merged by
+one class-aware, vectorized NMS (torchvision.ops.batched_nms).
+
+Usage:
+    results = detect_tiled(model, img, size=640, overlap=0.2, batch_size=8)
+    boxes = results.xyxy[0]  # x1, y1, x2, y2, confidence, class
+"""
+import math
+
+import torch
+import torchvision
+
+
+class TiledDetections:
+    """
+    Merged detections of a tiled image, with the xyxy / names attributes of YOLOv5 results.
+
+    Args:
+    boxes (torch.Tensor): (n, 6) detections: x1, y1, x2, y2, confidence, class.
+    names (list): Class names of the model.
+    tiles (int): Number of tiles the image was cut into.
+    """
+
+    def __init__(self, boxes, names, tiles):
+        self.xyxy = [boxes]
+        self.names = names
+        self.tiles = tiles
+        self.n = 1
+
+    def __len__(self):
+        return self.n
+
+
+def _tile_starts(length, tile, stride):
+    """
+    Returns the start positions of the tiles along one side, the last tile touching the edge.
+    """
+    if length <= tile:
+        return [0]
+    count = math.ceil((length - tile) / stride) + 1
+    return [min(index * stride, length - tile) for index in range(count)]
+
+
+def tile_grid(width, height, tile_size=640, overlap=0.2):
+    """
+    Computes the overlapping tiles covering an image.
+
+    Args:
+    width (int): Width of the image.
+    height (int): Height of the image.
+    tile_size (int): Side of a tile in pixels.
+    overlap (float): Fraction of a tile shared with its neighbours.
+
+    Returns:
+    list: (x1, y1, x2, y2) of each tile.
+    """
+    stride = max(int(tile_size * (1 - overlap)), 1)
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in _tile_starts(height, tile_size, stride)
+            for x in _tile_starts(width, tile_size, stride)]
+
+
+def detect_tiled(model, img, size=640, overlap=0.2, batch_size=8, iou_threshold=None, full_image=True, detect=None):
+    """
+    Runs object detection on overlapping tiles of a large image and merges the results.
+
+    Args:
+    model: The YOLOv5 model (AutoShape).
+    img (numpy.ndarray): The image on which to perform detection.
+    size (int): Model input size, also the side of the tiles.
+    overlap (float): Fraction of a tile shared with its neighbours.
+    batch_size (int): Number of tiles per forward pass; bounds the memory use.
+    iou_threshold (float): IoU threshold of the global NMS (model.iou by default).
+    full_image (bool): Also run the downscaled whole image, for the objects larger than a tile.
+    detect (callable): Returns one (n, 6) detections tensor per image of a list (e.g. through
+    prediction_cache, with per-call thresholds). None: model(images, size=size), with the conf and
+    iou thresholds set on the model.
+
+    Returns:
+    TiledDetections: The merged detections in image coordinates.
+    """
+    height, width = img.shape[:2]
+    tiles = tile_grid(width, height, size, overlap)
+    iou_threshold = model.iou if iou_threshold is None else iou_threshold
+    if detect is None:
+        detect = lambda images: model(images, size=size).xyxy
+    detections = []
+    if full_image and len(tiles) > 1:
+        detections.append(detect([img])[0])
+    for start in range(0, len(tiles), batch_size):
+        batch = tiles[start:start + batch_size]
+        results = detect([img[y1:y2, x1:x2] for x1, y1, x2, y2 in batch])
+        for (x1, y1, _, _), boxes in zip(batch, results):
+            if len(boxes):
+                offset = boxes.new_tensor([x1, y1, x1, y1])
+                detections.append(torch.cat([boxes[:, :4] + offset, boxes[:, 4:]], 1))
+    if not detections:
+        return TiledDetections(torch.zeros((0, 6)), model.names, len(tiles))
+    boxes = torch.cat(detections)
+    # NMS par classe sur toute l'image : supprime les doublons des zones de recouvrement
+    keep = torchvision.ops.batched_nms(boxes[:, :4], boxes[:, 4], boxes[:, 5].long(), iou_threshold)
+    return TiledDetections(boxes[keep], model.names, len(tiles))
@@ -1,23 +1,27 @@
 import streamlit as st  # Web application framework
-import torch  # Deep learning framework
-from PIL import Image, ImageDraw, ImageFont  # Image processing library
 import numpy as np  # Numerical operations library
+from tiling import detect_tiled  # Tiled inference for high-resolution images
+from model_registry import get_model  # Local model cache, no network at startup
+from batching import chunked, decode_uploads  # Parallel decoding and batching of uploads
+from prediction_cache import CachedDetections, default_cache, filter_predictions  # Raw predictions per image
+from rendering import default_renderer  # OpenCV box drawing with cached label glyphs
+from counting import ClassCounter, count_matrix, counts_to_dict  # Vectorized class counts
 
 @st.cache_resource()
 def load_model(model_name):
     """
-    Loads a specified YOLOv5 model from the ultralytics repository.
+    Loads a specified YOLOv5 model from the local model registry (torch.hub only if it is not cached).
 
     Args:
     model_name (str): Name of the YOLOv5 model to load (e.g., 'yolov5s', 'yolov5m', 'yolov5l', 'yolov5x').
 
     Returns:
-    model: The loaded YOLOv5 model.
+    model: The YOLOv5 model, loaded on first use.
     """
-    model = torch.hub.load('ultralytics/yolov5', model_name, pretrained=True)
+    model = get_model(model_name)
     return model
 
-def run_detection_image(model, img, conf_threshold, iou_threshold):
+def run_detection_image(model, img, conf_threshold, iou_threshold, tiled=False, overlap=0.2, tile_batch=8):
     """
     Runs object detection on an image using the specified YOLOv5 model.
 
@@ -26,13 +30,61 @@ def run_detection_image(model, img, conf_threshold, iou_threshold):
     img (numpy.ndarray): The image on which to perform detection.
     conf_threshold (float): The confidence threshold for detections.
     iou_threshold (float): The Intersection over Union (IoU) threshold for non-maximum suppression.
+    tiled (bool): Detect on overlapping 640x640 tiles when the image is larger than 640 (small objects).
+    overlap (float): Fraction of a tile shared with its neighbours in tiled mode.
+    tile_batch (int): Number of tiles per forward pass in tiled mode.
 
     Returns:
     results: The detection results containing bounding boxes, classes, and scores.
     """
-    model.conf = conf_threshold  # Set confidence threshold
-    model.iou = iou_threshold    # Set IoU threshold
-    results = model(img, size=640)
+    if tiled and max(img.shape[:2]) > 640:
+        # Tiles go through the prediction cache too, with the thresholds of this call: the model
+        # is shared by every session, so nothing is set on it
+        return detect_tiled(model, img, size=640, overlap=overlap, batch_size=tile_batch, iou_threshold=iou_threshold,
+                            detect=lambda tiles: detect_cached(model, tiles, conf_threshold, iou_threshold))
+    return run_detection_batch(model, [img], conf_threshold, iou_threshold)[0]
+
+def detect_cached(model, imgs, conf_threshold, iou_threshold):
+    """
+    Detects objects on images through the prediction cache.
+
+    Predictions before NMS are cached per image and model: the network only runs once per image
+    (in one batch), moving a threshold slider only re-filters the cached predictions.
+
+    Returns:
+    list: One (n, 6) detections tensor per image.
+    """
+    model_name = getattr(model, "name", None) or type(model).__name__
+    candidates = default_cache.predict(model, imgs, model_name, size=640)
+    return [filter_predictions(image_candidates, conf_threshold, iou_threshold, getattr(model, "max_det", 1000))
+            for image_candidates in candidates]
+
+def run_detection_batch(model, imgs, conf_threshold, iou_threshold, tiled=False, overlap=0.2, tile_batch=8):
+    """
+    Runs object detection on several images in a single forward pass.
+
+    Args:
+    model: The YOLOv5 model to use for detection.
+    imgs (list): The images (numpy.ndarray) on which to perform detection.
+    conf_threshold (float): The confidence threshold for detections.
+    iou_threshold (float): The Intersection over Union (IoU) threshold for non-maximum suppression.
+    tiled, overlap, tile_batch: Tiled inference options, see run_detection_image(); large images are
+    then detected tile by tile, the others still in one batch.
+
+    Returns:
+    list: One detection result per image, in the same order.
+    """
+    results = [None] * len(imgs)
+    if tiled:
+        for index, img in enumerate(imgs):
+            if max(img.shape[:2]) > 640:
+                results[index] = run_detection_image(model, img, conf_threshold, iou_threshold,
+                                                      tiled, overlap, tile_batch)
+    batch = [index for index, result in enumerate(results) if result is None]
+    if batch:
+        detections = detect_cached(model, [imgs[index] for index in batch], conf_threshold, iou_threshold)
+        for index, boxes in zip(batch, detections):
+            results[index] = CachedDetections(boxes, model.names)
     return results
 
 def draw_boxes(img, detections, box_color, box_width, class_names):
@@ -40,37 +92,16 @@ def draw_boxes(img, detections, box_color, box_width, class_names):
     Draws bounding boxes with labels on the image for each detection.
 
     Args:
-    img (PIL.Image.Image): The image to draw bounding boxes on.
+    img (numpy.ndarray): The RGB image to draw bounding boxes on, modified in place.
     detections: Detection results from the YOLOv5 model.
     box_color (str): Color of the bounding boxes.
     box_width (int): Width of the bounding boxes.
     class_names (list): List of class names corresponding to the model's detection classes.
-    """
-    draw = ImageDraw.Draw(img)
-    font = ImageFont.load_default()  # Load default font
-    for *xyxy, conf, cls in reversed(detections):
-        xyxy = [int(x) for x in xyxy]  # Convert coordinates to integers
-        label = f"{class_names[int(cls)]} {conf:.2f}"  # Create label with class name and confidence score
-        draw.rectangle(xyxy, outline=box_color, width=box_width)
-        draw.text((xyxy[0], xyxy[1] - 10), label, fill=box_color, font=font)
-
-def count_classes(results, class_names):
-    """
-    Counts the number of detected objects for each class.
-
-    Args:
-    results: The detection results from the YOLOv5 model.
-    class_names (list): List of class names corresponding to the model's detection classes.
 
     Returns:
-    class_counts (dict): A dictionary with class names as keys and counts as values.
+    numpy.ndarray: The image with the detections.
     """
-    class_counts = {}
-    for det in results.xyxy[0]:  # Loop through detections
-        class_id = int(det[5])
-        class_name = class_names[class_id]
-        class_counts[class_name] = class_counts.get(class_name, 0) + 1
-    return class_counts
+    return default_renderer.draw(img, detections, class_names, box_color, box_width)
 
 def main():
     """
@@ -87,28 +118,53 @@ def main():
     box_color = st.sidebar.color_picker("Choose Box Color", '#FF0000')
     box_width = st.sidebar.slider("Box Width", 1, 10, 2)
 
+    # Sidebar options for tiled inference on high-resolution images
+    tiled = st.sidebar.checkbox("Tiled inference (small objects in large images)", False)
+    overlap = st.sidebar.slider("Tile Overlap", 0.0, 0.5, 0.2, disabled=not tiled)
+    tile_batch = st.sidebar.slider("Tiles per Batch", 1, 32, 8, disabled=not tiled)
+
+    # Number of uploaded images detected together in one forward pass
+    batch_size = st.sidebar.slider("Images per Batch", 1, 64, 16)
+
     # Load selected model
     model = load_model(model_choice)
 
     # File uploader for images
     uploaded_files = st.file_uploader("Upload Images", type=["jpg", "jpeg", "png", "bmp", "gif"], accept_multiple_files=True)
     if uploaded_files:
-        for uploaded_file in uploaded_files:
-            image = Image.open(uploaded_file).convert('RGB')
-            st.image(image, caption=f"Uploaded Image: {uploaded_file.name}", use_column_width=True)
-
-            # Run detection and draw boxes on the image
-            results = run_detection_image(model, np.array(image), conf_threshold, iou_threshold)
-            if results.xyxy[0].numel() == 0:  # Check if there are any detections
-                st.write("No detections.")
-            else:
-                draw_boxes(image, results.xyxy[0], box_color, box_width, model.names)
-                st.image(image, caption=f"Image with Detections: {uploaded_file.name}", use_column_width=True)
-
-                # Count and display the number of objects detected per class
-                class_counts = count_classes(results, model.names)
-                st.write("Detected Objects Count by Class:")
-                st.table(class_counts.items())
+        progress = st.progress(0.0)
+        done = 0
+        counter = ClassCounter(len(model.names))  # Counts over all the uploaded images
+        # Images decoded in parallel, detected chunk by chunk; each chunk is shown as soon as it is ready
+        for chunk in chunked(decode_uploads(uploaded_files), batch_size):
+            for name, image, _ in chunk:
+                if image is None:
+                    st.error(f"Cannot read {name}")
+            valid = [item for item in chunk if item[1] is not None]
+            batch_results = run_detection_batch(model, [array for _, _, array in valid], conf_threshold,
+                                                iou_threshold, tiled, overlap, tile_batch)
+            # Per image x per class counts of the whole chunk at once
+            counts = counter.update(count_matrix([results.xyxy[0] for results in batch_results], len(model.names)))
+            for (name, image, _), results, image_counts in zip(valid, batch_results, counts):
+                st.image(image, caption=f"Uploaded Image: {name}", use_column_width=True)
+
+                # Draw boxes on the image
+                if results.xyxy[0].numel() == 0:  # Check if there are any detections
+                    st.write("No detections.")
+                else:
+                    annotated = draw_boxes(np.array(image), results.xyxy[0], box_color, box_width, model.names)
+                    st.image(annotated, caption=f"Image with Detections: {name}", use_column_width=True)
+
+                    # Count and display the number of objects detected per class
+                    class_counts = counts_to_dict(image_counts, model.names)
+                    st.write("Detected Objects Count by Class:")
+                    st.table(class_counts.items())
+            done += len(chunk)
+            progress.progress(done / len(uploaded_files))
+
+        # Count and display the number of objects detected per class over all the images
+        st.write(f"Detected Objects Count by Class, all {counter.images} images:")
+        st.table(counts_to_dict(counter.totals, model.names).items())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
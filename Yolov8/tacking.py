@@ -1,5 +1,26 @@
+import os
+import sys
+import time
+
 from ultralytics import YOLO
 
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'V8'))
+from tracking import TrackLog, run_tracking
+from trajectories import TrajectoryStore
+
 model  =  YOLO("yolov8s.pt")
 
-ok = model.track(source="0", conf=0.25, iou = 0.7, show = True, save= True)
\ No newline at end of file
+# Suivi en flux, mémoire constante : les pistes sont écrites dans un journal par exécution
+# (image, id, classe, boîte, confiance) au lieu d'une vidéo annotée dans runs/detect ;
+# les ids de pistes repartent de zéro à chaque exécution, d'où un fichier distinct
+log_path = time.strftime("tracks_%Y%m%d_%H%M%S.tracklog")
+with TrackLog(log_path) as log:
+    frames = run_tracking(model, "0", log, show=True, conf=0.25, iou=0.7)
+print(f"{frames} images, {log.rows_written} positions de pistes enregistrées")
+
+# Trajectoires interrogeables (index temporel et spatial) de cette exécution seulement :
+# temps passé à l'image par piste
+store = TrajectoryStore.from_track_log(log_path)
+dwell = store.dwell_times()
+for track_id in sorted(dwell, key=dwell.get, reverse=True)[:10]:
+    print(f"{store.tracks[track_id]} : {dwell[track_id]:.1f} s à l'image")